@@ -6,9 +6,6 @@ from typing import Literal
 t_init_start = time.perf_counter_ns()
 
 import cyclopts
-import geopandas as gpd
-import pandas as pd
-import polars as pl
 from rich.console import Console
 
 import bolt
@@ -183,12 +180,18 @@ def update(
     skip_db=False,
     ignore_errors=False,
     download=True,
+    jobs: int = 1,
 ):
     """Updates datasource by name, or all configured datasources ('.').
 
     Alternatively, update only the data warehouse using 'db'.
+    Datasources are updated in the order of their dependencies (`depends_on` in
+    config.toml), and are re-run when a datasource they depend on changes.
+    Use '--jobs N' to update independent datasources in N parallel processes
+    (database writes are always done one at a time by this process).
     Examples:
         `python bolt-cmd.py update .`  # updates everything
+        `python bolt-cmd.py update . --jobs 4`  # updates everything (4 processes)
         `python bolt-cmd.py update db`  # updates only the database
         `python bolt-cmd.py update <datasource>`  # updates <datasource>
     """
@@ -206,15 +209,16 @@ def update(
     else:
         datasources = [getattr(bolt.datasources, datasource_name)]
 
-    # Database
-    db = bolt.warehouse.connect()
-    db.sql(
+    # Database (one session for the whole update)
+    wh = bolt.warehouse.Warehouse()
+    wh.sql(
         "CREATE TABLE IF NOT EXISTS data_updates (datasource VARCHAR PRIMARY KEY, last_updated DATE, hash VARCHAR(7));"
     )
-    db.close()
 
     # A list of errors to print
     errors: list[tuple[str, Exception]] = []
+    # Tables loaded into the database
+    loaded: set[str] = set()
     # Process datasources
     if datasources:
         tables_loaded = 0
@@ -223,54 +227,106 @@ def update(
             update_msg = "Updating datasources (force=True):"
         console.print(update_msg)
 
-        for D in datasources:
-            try:
-                d = D()
-                if d.name in ignore:
-                    console.print(f"        [yellow]Skipped: {d.name} (ignored)[/]")
-                    continue
-                db = bolt.warehouse.connect()
-
-                ## Hash (sha256) the source files
-                current_hash = bolt.warehouse.hash_sources(d)
-                if not force:
-                    # Ignore update for datasources with no changes to the source files
-                    ## Get the last hash (sha256) of the source files
-                    update_hash = db.sql(
-                        f"SELECT hash FROM data_updates WHERE datasource = '{d.name}'"
-                    ).pl()["hash"]
-                    ## Compare hashes and skip if they are the same
-                    if (
-                        not update_hash.is_empty()
-                        and current_hash == update_hash.item()
+        db = wh.cursor()
+        try:
+            # Download the source URLs (`source_url`) of all datasources at once,
+            # so that new source files are found when hashing (unchanged files
+            # are not downloaded again; see `bolt.utils.download`)
+            # Datasources that still need to download (with a `download` method)
+            to_download: bool | set[str] = download
+            if download:
+                to_download = set()
+                downloads: list[tuple[str, Path]] = []
+                for D in datasources:
+                    try:
+                        d = D()
+                    except Exception:
+                        continue  # Reported below
+                    if d.name in ignore:
+                        continue
+                    if hasattr(d, "download"):
+                        to_download.add(d.name)
+                        continue
+                    source_dir = Path(d.metadata["source_dir"])
+                    downloads.extend((url, source_dir) for url in d.source_urls)
+                if downloads:
+                    with console.status(
+                        f"[cyan]      Downloading {len(downloads)} file(s)...[/]"
                     ):
-                        console.print(
-                            f"        [yellow]Skipped: {d.name} (unchanged)[/]"
-                        )
+                        results = bolt.utils.download_many(downloads)
+                    for url, result in results.items():
+                        if isinstance(result, Exception):
+                            errors.append((url, result))
+                            console.print(f"        [red]Failed: {url}[/]")
+                            if not ignore_errors:
+                                raise result
+
+            # Hash the sources of each datasource (name: source hash)
+            hashes: dict[str, str] = {}
+            # Datasources with changed source files (or code)
+            stale: set[str] = set()
+            for D in datasources:
+                name = D.__name__
+                try:
+                    d = D()
+                    if d.name in ignore:
+                        console.print(f"        [yellow]Skipped: {d.name} (ignored)[/]")
                         continue
-                with console.status(f"[cyan]      Updating {d.name}...[/]"):
-                    df = d.update(download)  # noqa: F841
-                    # Write to database
-                    if isinstance(df, gpd.GeoDataFrame):
+                    ## Hash (sha256) the source files
+                    current_hash = bolt.warehouse.hash_sources(d)
+                    if not force:
+                        # Ignore update for datasources with no changes to the source files
+                        ## Get the last hash (sha256) of the source files
+                        update_hash = db.sql(
+                            f"SELECT hash FROM data_updates WHERE datasource = '{d.name}'"
+                        ).pl()["hash"]
+                        ## Compare hashes; skipped unless an upstream datasource changes
+                        if update_hash.is_empty() or current_hash != update_hash.item():
+                            stale.add(d.name)
+                        ## Compare the cache metadata (e.g. the datasource code changed)
+                        elif not d.is_cache_fresh():
+                            stale.add(d.name)
+                    else:
+                        stale.add(d.name)
+                    hashes[d.name] = current_hash
+                except Exception as e:
+                    errors.append((name, e))
+                    console.print(f"        [red]Failed: {name}[/]")
+                    if not ignore_errors:
+                        raise e
+
+            # Update datasources in dependency order (in parallel if jobs > 1)
+            # and write to the database as they finish
+            graph = bolt.pipeline.get_dependency_graph(hashes)
+            with console.status(
+                f"[cyan]      Updating {len(stale)} datasource(s)...[/]"
+            ):
+                for result in bolt.pipeline.update_graph(
+                    graph, stale, jobs, to_download
+                ):
+                    try:
+                        if result.error:
+                            raise result.error
+                        if result.skipped:
+                            console.print(
+                                f"        [yellow]Skipped: {result.name} (unchanged)[/]"
+                            )
+                            continue
+                        if bolt.warehouse.load_datasource(db, result):
+                            tables_loaded += 1
+                            loaded.add(result.name)
                         db.sql(
-                            f"CREATE OR REPLACE TABLE {d.name} AS SELECT * FROM st_read('{d.cache_path}');"
+                            f"INSERT OR REPLACE INTO data_updates VALUES ('{result.name}', '{dt.date.today()}', '{hashes[result.name]}')"
                         )
-                        tables_loaded += 1
-                    elif isinstance(df, (pl.DataFrame, pd.DataFrame)):
-                        db.sql(f"CREATE OR REPLACE TABLE {d.name} AS SELECT * FROM df")
-                        tables_loaded += 1
-
-                    db.sql(
-                        f"INSERT OR REPLACE INTO data_updates VALUES ('{d.name}', '{dt.date.today()}', '{current_hash}')"
-                    )
-                    console.print(f"        [green]Updated: {d.name}[/]")
-            except Exception as e:
-                errors.append((d.name, e))
-                console.print(f"        [red]Failed: {d.name}[/]")
-                if not ignore_errors:
-                    raise e
-            finally:
-                db.close()
+                        console.print(f"        [green]Updated: {result.name}[/]")
+                    except Exception as e:
+                        errors.append((result.name, e))
+                        console.print(f"        [red]Failed: {result.name}[/]")
+                        if not ignore_errors:
+                            raise e
+        except BaseException:
+            wh.close()
+            raise
         console.print(f"    Tables Loaded: {tables_loaded}")
 
     # Update database
@@ -284,10 +340,21 @@ def update(
         else:
             console.print("        [yellow]Skipped (ignored)[/].")
     else:
-        with console.status("Updating database:"):
+        with console.status("Updating database:") as status:
             try:
-                sql_file_count, compact_msg = bolt.warehouse.update_sql(compact_db=True)
-                bolt.warehouse.create_schemas()
+                # Only re-run SQL downstream of loaded tables (or all, for 'db')
+                changed_tables = loaded if datasources else None
+                sql_file_count, _ = bolt.warehouse.update_sql(
+                    wh=wh, changed_tables=changed_tables
+                )
+                bolt.warehouse.create_schemas(wh)
+                # The session must be closed before compacting
+                wh.close()
+                compact_msg = bolt.warehouse.compact(
+                    progress=lambda table, i, n: status.update(
+                        f"Compacting database: {table} ({i}/{n})"
+                    )
+                )
                 db_msg = (
                     f"        [green]Updated: {bolt.config.db_name}[/]\n"
                     f"            SQL Files Executed: {sql_file_count}\n"
@@ -297,6 +364,7 @@ def update(
                 errors.append((bolt.config.db_name, e))
                 db_msg = f"        [red]Failed: {bolt.config.db_name}[/]"
         console.print(db_msg)
+    wh.close()
 
     console.print(f"\nErrors: {len(errors)}")
     for name, err in errors:
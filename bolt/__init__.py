@@ -1,6 +1,14 @@
-from . import datasources, reports, utils, warehouse
+from . import datasources, pipeline, reports, utils, warehouse
 from .utils import config  # provide a shortcut accessor
 
 __version__ = "0.2.0"
 
-__all__ = ["config", "datasources", "reports", "utils", "warehouse", "__version__"]
+__all__ = [
+    "config",
+    "datasources",
+    "pipeline",
+    "reports",
+    "utils",
+    "warehouse",
+    "__version__",
+]
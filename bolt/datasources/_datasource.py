@@ -1,8 +1,13 @@
 """Datasource ABC."""
 
 import datetime as dt
+import inspect
+import json
+import shutil
+import time
 from abc import ABC, abstractmethod
 from getpass import getuser
+from hashlib import sha256
 from pathlib import Path
 from platform import node
 from typing import Annotated
@@ -15,9 +20,21 @@ from pydantic import BaseModel
 from sqlalchemy import Engine
 from typing_extensions import Doc
 
-from bolt.utils import config, make_logger, version
+from bolt.utils import (
+    Manifest,
+    YearMonth,
+    config,
+    download_many,
+    hash_file,
+    make_logger,
+    version,
+)
+from bolt.utils.rules import Report, Rule, ValidationError, check
 
-SUPPORTED_CACHE_TYPES = ("DISABLE", "feather")
+SUPPORTED_CACHE_TYPES = ("arrow", "parquet")
+
+# Algorithm used to hash source files (e.g. "xxh3_64" is much faster; requires xxhash)
+HASH_ALGORITHM: str = getattr(config, "hash_algorithm", "sha256")
 
 READERS = {
     # "xlsx": pd.read_excel,
@@ -40,16 +57,28 @@ class CacheMetaData(BaseModel):
     # log_path: str
     # log_md5: str
     datasource_version: str
-    # datasource_md5: str
+    # Hash of the module that defines the datasource
+    datasource_hash: str = ""
     sources: list[str]
+    hash_algorithm: str = HASH_ALGORITHM
+    source_hashes: dict[str, str] = {}
+    row_count: int | None = None
+    # Column names and dtypes
+    columns: dict[str, str] = {}
+    # Seconds taken by each step of the update
+    timings: dict[str, float] = {}
 
 
 class Datasource[T](ABC):
     """Abstract class defining Datasource classes."""
 
+    # Data quality rules checked by `validate` (see `bolt.utils.rules`)
+    rules: list[Rule] = []
+
     def __init__(self):
         self.logger = make_logger(self.name, config.log_dir)
         self.lazy_load_raw = True
+        # Dtypes of raw columns, applied when scanning (see `schema.overrides`)
         self.schema_overrides: pl.Schema | None = None
 
         # Metadata
@@ -65,10 +94,49 @@ class Datasource[T](ABC):
             }
         except KeyError:
             raise KeyError(f"Name mismatch: '{self.name}' not in config.toml")
+        # Only extract and transform new or changed source files (see `update_incremental`)
+        self.incremental: bool = self.metadata.get("incremental", False)
 
-        # Cache path
+        # Column to partition the cache by, e.g. "YMTH" (Hive-style directories:
+        #  '{cache_dir}/{name}/YMTH=202501/part.parquet')
+        self.cache_partition_by: str | None = self.metadata.get("cache_partition_by")
+        # Cache format ("arrow" or "parquet") and path
+        self.cache_format: str = self.metadata.get(
+            "cache_format", "parquet" if self.cache_partition_by else "arrow"
+        )
+        if self.cache_format not in SUPPORTED_CACHE_TYPES:
+            raise ValueError(f"Unsupported cache_format: '{self.cache_format}'")
+        if self.cache_partition_by and self.cache_format != "parquet":
+            raise ValueError("Partitioned caches require cache_format = 'parquet'")
+        if self.cache_format == "parquet" and self.metadata.get(
+            "load_with_geopandas", False
+        ):
+            raise ValueError("Parquet caches are not supported for spatial data")
+        # Compression of Arrow caches ("uncompressed", "lz4", or "zstd");
+        #  only uncompressed caches can be memory-mapped (zero-copy) by `read_cache`
+        self.cache_compression: str = self.metadata.get(
+            "cache_compression", "uncompressed"
+        )
+        # Column(s) to sort cached data by (improves Parquet row group statistics)
+        self.cache_sort_by: str | list[str] | None = self.metadata.get("cache_sort_by")
         # TODO: gpkg for spatial files?
-        self.cache_path = config.cache_dir.joinpath(f'{self.metadata["name"]}.arrow')
+        self.cache_path = config.cache_dir.joinpath(
+            f"{self.metadata['name']}.{self.cache_format}"
+        )
+        if self.cache_partition_by:
+            self.cache_path = config.cache_dir.joinpath(self.metadata["name"])
+        # Per-source-file caches and manifest (for incremental updates)
+        self.parts_dir = config.cache_dir.joinpath(".parts", self.metadata["name"])
+        self.manifest_path = self.parts_dir.joinpath("manifest.json")
+        # Hashes of source files (by path, size, and modification time)
+        self.hashes_path = config.cache_dir.joinpath(".hashes", f"{self.name}.json")
+        # Cache metadata (sidecar) file
+        self.metadata_path = config.cache_dir.joinpath(".metadata", f"{self.name}.json")
+        # Seconds taken by each step of the last update
+        self.timings: dict[str, float] = {}
+        # Cached parts that were only appended by the last incremental update
+        #  (None if the whole table must be replaced)
+        self.appended_parts: list[Path] | None = None
 
         self.raw: Annotated[
             list[tuple[str, pl.DataFrame | pd.DataFrame | gpd.GeoDataFrame]] | None,
@@ -76,9 +144,9 @@ class Datasource[T](ABC):
         ] = None
 
         self.data: Annotated[
-            pl.DataFrame | pd.DataFrame | gpd.GeoDataFrame | None,
+            pl.DataFrame | pl.LazyFrame | pd.DataFrame | gpd.GeoDataFrame | None,
             Doc(
-                "DataFrame or GeoDataFrame of processed data (created by `transform` or loaded from cache with `read_cache`)"
+                "DataFrame, LazyFrame, or GeoDataFrame of processed data (created by `transform` or loaded from cache with `read_cache`)"
             ),
         ] = None
         # self.logger.debug(f"Initialized {self.name}")
@@ -101,13 +169,55 @@ class Datasource[T](ABC):
             if not p.name.startswith("_") and not p.name.startswith("~")
         ]
 
-    def extract(self):
-        """Open the raw data source file(s). Can be over-written to customize."""
+    @property
+    def source_urls(self) -> list[str]:
+        """URLs of the source files (`source_url` metadata; a URL or list of URLs)."""
+        urls: str | list[str] = self.metadata.get("source_url", [])
+        return [urls] if isinstance(urls, str) else list(urls)
+
+    def download_sources(self) -> None:
+        """Downloads the `source_urls` to the 'source_dir' (concurrently).
+
+        Unchanged files are not downloaded again, and interrupted downloads are
+        resumed; see `bolt.utils.download`. To customize, define a `download`
+        method instead.
+        """
+        out_dir = Path(self.metadata["source_dir"])
+        results = download_many([(url, out_dir) for url in self.source_urls])
+        for url, result in results.items():
+            if isinstance(result, Exception):
+                raise result
+        return
+
+    def _download(self) -> None:
+        """Runs the `download` method (if defined), or downloads the `source_urls`."""
+        start = time.perf_counter()
+        if hasattr(self, "download"):
+            self.logger.info("'download' method found and running")
+            self.download()
+        elif self.source_urls:
+            self.logger.info("Downloading source URLs")
+            self.download_sources()
+        else:
+            return
+        self.timings["download"] = time.perf_counter() - start
+        return
+
+    def extract(self, files: list[str] | None = None):
+        """Open the raw data source file(s). Can be over-written to customize.
+
+        Parameters
+        ----------
+        files : list[str] | None
+            Source files to open (default all `source_files`).
+        """
         kwargs = {
             "infer_schema_length": 10000,
             "schema_overrides": self.schema_overrides,
         }
-        if len(self.source_files) == 0:
+        if files is None:
+            files = self.source_files
+        if len(files) == 0:
             raise AttributeError(f"Datasource `{self.name}` has no source files")
         ext = self.metadata["filename"].split(".")[-1].lower()
         if ext == "txt":
@@ -117,15 +227,14 @@ class Datasource[T](ABC):
         if self.metadata.get("load_with_geopandas", False):
             # TODO: would we ever read multiple?
             layer = self.metadata.get("layer", 0)
-            self.raw = gpd.read_file(self.source_files[0], layer=layer)
+            self.raw = gpd.read_file(files[0], layer=layer)
             self.logger.debug(f"Extracted raw data ({layer}; with geopandas)")
         else:
             read_func = READERS.get(ext, None)
             scan_func = SCANNERS.get(ext, None)
             if self.lazy_load_raw and scan_func:
                 self.raw = [
-                    (p, scan_func(p, ignore_errors=True, **kwargs))
-                    for p in self.source_files
+                    (p, scan_func(p, ignore_errors=True, **kwargs)) for p in files
                 ]
             else:
                 self.raw = [
@@ -138,7 +247,7 @@ class Datasource[T](ABC):
                             **kwargs,
                         ),
                     )
-                    for p in self.source_files
+                    for p in files
                 ]
             self.logger.debug("Extracted raw data")
         # TODO: self.logger.debug("Raw files loaded: 8/8")
@@ -161,57 +270,347 @@ class Datasource[T](ABC):
         self.data.to_sql(self.name, dst, *args, **kwargs)
         return
 
-    def write_cache(self, *args, **kwargs) -> None:
-        """How to cache processed data."""
+    def _partition_path(self, value) -> Path:
+        """Path of a cache partition (Hive-style)."""
+        return self.cache_path.joinpath(
+            f"{self.cache_partition_by}={value}", "part.parquet"
+        )
+
+    def cache_partitions(self) -> dict[int | str, Path]:
+        """Gets the existing partitions of a partitioned cache (value: path)."""
+        partitions = {}
+        for p in self.cache_path.glob(f"{self.cache_partition_by}=*/part.parquet"):
+            value = p.parent.name.split("=", 1)[1]
+            # Values read back as they were written (e.g. "01" stays a string)
+            is_int = value.isdigit() and str(int(value)) == value
+            partitions[int(value) if is_int else value] = p
+        return dict(sorted(partitions.items(), key=lambda i: str(i[0])))
+
+    def _write_partitions(
+        self,
+        data: pl.DataFrame | pl.LazyFrame,
+        replace: bool | set = True,
+        validate=False,
+    ):
+        """Writes (replaces) only the cache partitions that are in `data`.
+
+        Raises a `ValueError` if the partition column has nulls (they have no
+        partition). See `write_cache` for `validate`.
+        """
+        col = self.cache_partition_by
+        tmp_path = None
+        try:
+            if isinstance(data, pl.LazyFrame):
+                # Stream the query results to a temporary file, then split it
+                tmp_path = self.cache_path.with_name(
+                    f"{self.cache_path.name}.tmp.parquet"
+                )
+                data.sink_parquet(tmp_path, engine="streaming")
+                data = pl.scan_parquet(tmp_path)
+                if validate:
+                    self._validate_written(data)
+                values = data.select(pl.col(col).unique()).collect()[col].to_list()
+                if None in values:
+                    raise ValueError(f"Null values in partition column '{col}'")
+                partitions = (
+                    (v, data.filter(pl.col(col) == v).collect()) for v in values
+                )
+            else:
+                if data[col].has_nulls():
+                    raise ValueError(f"Null values in partition column '{col}'")
+                partitions = (
+                    (k[0], df) for k, df in data.partition_by(col, as_dict=True).items()
+                )
+            # Partition values are compared as they appear in the paths
+            written: set[str] = set()
+            for value, df in partitions:
+                path = self._partition_path(value)
+                path.parent.mkdir(parents=True, exist_ok=True)
+                # Write to a temporary file and swap, so readers never see partial files
+                df.write_parquet(
+                    path.with_suffix(".tmp"), compression="zstd", statistics=True
+                )
+                path.with_suffix(".tmp").replace(path)
+                written.add(str(value))
+        finally:
+            if tmp_path:
+                tmp_path.unlink(missing_ok=True)
+        if replace:
+            # Remove partitions that are no longer in the data
+            removable = replace is True or {str(v) for v in replace}
+            for path in self.cache_partitions().values():
+                value = path.parent.name.split("=", 1)[1]
+                if value not in written and (removable is True or value in removable):
+                    shutil.rmtree(path.parent)
+        self.logger.debug(f"Wrote {len(written)} cache partition(s)")
+        return
+
+    def _validate_written(self, data: pl.LazyFrame) -> None:
+        """Validates data that was written to a file (a scan of it); see `validate`.
+
+        `data` is swapped in while `validate` runs, so `validate` methods that
+        only check `self.data` also work.
+        """
+        start = time.perf_counter()
+        previous, self.data = self.data, data
+        try:
+            self.validate()
+        finally:
+            self.data = previous
+        self.timings["validate"] = time.perf_counter() - start
+        return
+
+    def write_cache(
+        self, *args, replace: bool | set = True, validate=False, **kwargs
+    ) -> None:
+        """How to cache processed data.
+
+        Parameters
+        ----------
+        replace : bool | set (default True)
+            For partitioned caches, remove existing partitions that are not in the
+            data. If False, only the partitions in the data are (re-)written.
+            If a set of partition values, only those partitions may be removed.
+        validate : bool (default False)
+            Validate lazy data (see `validate`) once it is streamed to a
+            temporary file, before it replaces the cache, so the query is only
+            run once. If it fails, the existing cache is left as it was.
+        """
+        start = time.perf_counter()
         written = False
         if isinstance(self.data, gpd.GeoDataFrame):
             self.data.to_file(self.cache_path)
             written = True
-        elif isinstance(self.data, pl.DataFrame):
-            self.data.write_ipc(self.cache_path)
+        elif isinstance(self.data, (pl.DataFrame, pl.LazyFrame)):
+            data = self.data
+            if self.cache_sort_by:
+                data = data.sort(self.cache_sort_by)
+            if self.cache_partition_by:
+                self._write_partitions(data, replace=replace, validate=validate)
+                if isinstance(data, pl.LazyFrame):
+                    self.data = self.scan_cache()
+            elif isinstance(data, pl.DataFrame):
+                if self.cache_format == "parquet":
+                    data.write_parquet(
+                        self.cache_path, compression="zstd", statistics=True
+                    )
+                else:
+                    data.write_ipc(self.cache_path, compression=self.cache_compression)
+            else:
+                # Stream the query results to a temporary file (without loading
+                #  them into memory), then swap it in
+                tmp_path = self.cache_path.with_suffix(f".tmp{self.cache_path.suffix}")
+                try:
+                    if self.cache_format == "parquet":
+                        data.sink_parquet(
+                            tmp_path,
+                            compression="zstd",
+                            statistics=True,
+                            engine="streaming",
+                        )
+                        written_data = pl.scan_parquet(tmp_path)
+                    else:
+                        data.sink_ipc(
+                            tmp_path,
+                            compression=self.cache_compression,
+                            engine="streaming",
+                        )
+                        written_data = pl.scan_ipc(tmp_path, memory_map=False)
+                    if validate:
+                        self._validate_written(written_data)
+                    tmp_path.replace(self.cache_path)
+                finally:
+                    tmp_path.unlink(missing_ok=True)
+                # Scan the results rather than re-running the query
+                self.data = self.scan_cache()
             written = True
         elif isinstance(self.data, pd.DataFrame):
-            self.data.to_feather(self.cache_path)
+            if self.cache_format == "parquet":
+                self.data.to_parquet(self.cache_path, compression="zstd")
+            else:
+                self.data.to_feather(
+                    self.cache_path, compression=self.cache_compression
+                )
             written = True
         if written:
             self.logger.info(f"Wrote cache file: {self.cache_path}")
-        # metadata = self.cache_metadata()  # TODO: implement
-        # self.logger.info(f"Metadata (processed_by): {metadata.processed_by}")
-        # self.logger.info(f"Metadata (version): {metadata.datasource_version}")
-        # self.logger.info(f"Metadata (sources): {metadata.sources}")
-        # ....
-
-        # TODO: dump cache metadata
-        # self.cache_metadata().dump()...
+            self.timings["write_cache"] = time.perf_counter() - start
+            if validate and "validate" in self.timings:
+                self.timings["write_cache"] -= self.timings["validate"]
+            metadata = self.write_cache_metadata()
+            self.logger.info(f"Metadata (processed_by): {metadata.processed_by}")
+            self.logger.info(f"Metadata (version): {metadata.datasource_version}")
+            self.logger.info(f"Metadata (rows): {metadata.row_count}")
         return
 
+    def code_hash(self) -> str:
+        """Gets the hash of the module (file) that defines the datasource."""
+        def_path = self.metadata.get("def_path") or inspect.getfile(type(self))
+        return hash_file(def_path)
+
+    def source_manifest(self) -> Manifest:
+        """Gets the path, size, modification time, and hash of each source file.
+
+        Hashes are reused for files with the same size and modification time, so
+        unchanged source files are not re-read.
+        """
+        previous = Manifest.load(self.hashes_path)
+        manifest = Manifest.from_files(self.source_files, previous, HASH_ALGORITHM)
+        if manifest != previous:
+            manifest.dump(self.hashes_path)
+        return manifest
+
     def cache_metadata(self):
+        if isinstance(self.data, (pl.DataFrame, pl.LazyFrame)):
+            # Describe the (whole) cache, which may differ from a partial update
+            lf = self.scan_cache()
+            row_count = lf.select(pl.len()).collect().item()
+            columns = {k: str(v) for k, v in lf.collect_schema().items()}
+        elif self.data is not None:
+            row_count = len(self.data)
+            columns = {str(k): str(v) for k, v in self.data.dtypes.items()}
+        else:
+            row_count, columns = None, {}
         cmeta = CacheMetaData(
-            filename=f"{self.name}.feather",
+            filename=self.cache_path.name,
             export_date=dt.datetime.now().strftime("%Y-%m-%d"),
             processed_by=f"{getuser()}/{node()}",
             # log_path=self.log.path,
             # log_md5=hashfile(self.log.path),
             datasource_version=str(self.version),  # TODO: wip
-            # datasource_md5=hashfile(Path(__file__).absolute()),
+            datasource_hash=self.code_hash(),
             sources=sorted(self.source_files, reverse=True),
+            source_hashes={p: f.hash for p, f in self.source_manifest().files.items()},
+            row_count=row_count,
+            columns=columns,
+            timings=self.timings,
         )
         return cmeta
 
-    def read_cache(self, *args, **kwargs) -> T:
-        """Loads data attribute from cache file."""
+    def write_cache_metadata(self) -> CacheMetaData:
+        """Writes the cache metadata to a JSON (sidecar) file in 'cache_dir/.metadata'."""
+        metadata = self.cache_metadata()
+        self.metadata_path.parent.mkdir(parents=True, exist_ok=True)
+        tmp_path = self.metadata_path.with_suffix(".tmp")
+        with tmp_path.open("w") as f:
+            f.write(metadata.model_dump_json(indent=2))
+        tmp_path.replace(self.metadata_path)
+        return metadata
+
+    def read_cache_metadata(self) -> CacheMetaData | None:
+        """Loads the metadata written with the cache (None if there is none)."""
+        if not self.metadata_path.exists():
+            return None
+        with self.metadata_path.open() as f:
+            return CacheMetaData.model_validate(json.load(f))
+
+    def is_cache_fresh(self) -> bool:
+        """Whether the cache was made from the current source files and code.
+
+        Source files are not opened unless their size or modification time has
+        changed since they were last hashed.
+        """
+        metadata = self.read_cache_metadata()
+        if metadata is None or not self.cache_path.exists():
+            return False
+        if metadata.datasource_hash != self.code_hash():
+            return False
+        manifest = self.source_manifest()
+        return metadata.hash_algorithm == manifest.algorithm and (
+            metadata.source_hashes == {p: f.hash for p, f in manifest.files.items()}
+        )
+
+    def scan_cache(
+        self, ymth_range: tuple[int | YearMonth, int | YearMonth] | None = None
+    ) -> pl.LazyFrame:
+        """Lazily scans the cache file.
+
+        Parameters
+        ----------
+        ymth_range : tuple[int | YearMonth, int | YearMonth] | None
+            For caches partitioned by Year-Month, only scan the partitions in
+            this (inclusive) range.
+        """
+        if self.cache_partition_by:
+            partitions = self.cache_partitions()
+            if not partitions:
+                raise FileNotFoundError(f"No cache partitions found: {self.cache_path}")
+            paths = list(partitions.values())
+            if ymth_range:
+                start, end = (int(i) for i in ymth_range)
+                paths = [p for v, p in partitions.items() if start <= int(v) <= end]
+                if not paths:
+                    # Empty, with the schema of the cache
+                    return pl.scan_parquet(next(iter(partitions.values()))).clear()
+            return pl.scan_parquet(paths)
+        if ymth_range:
+            raise ValueError("`ymth_range` requires a partitioned cache")
+        if self.cache_format == "parquet":
+            return pl.scan_parquet(self.cache_path)
+        return pl.scan_ipc(self.cache_path, memory_map=True)
+
+    def read_cache(
+        self,
+        *args,
+        columns: list[str] | None = None,
+        filters: pl.Expr | list[pl.Expr] | None = None,
+        ymth_range: tuple[int | YearMonth, int | YearMonth] | None = None,
+        lazy=False,
+        memory_map=True,
+        **kwargs,
+    ) -> T:
+        """Loads data attribute from cache file.
+
+        Parameters
+        ----------
+        columns : list[str] | None
+            Only read these columns (default all).
+        filters : pl.Expr | list[pl.Expr] | None
+            Only read rows that match these predicates. Filters are pushed down
+            into the scan (Parquet row groups are skipped using their statistics).
+        ymth_range : tuple[int | YearMonth, int | YearMonth] | None
+            Only read the partitions in this (inclusive) Year-Month range
+            (requires a cache partitioned by Year-Month; see `cache_partition_by`).
+        lazy : bool (default False)
+            Set the data attribute to a LazyFrame (scan) instead of reading data.
+        memory_map : bool (default True)
+            Memory-map Arrow caches rather than reading them into memory. Reading
+            an uncompressed cache is then near-instant and zero-copy (and readers
+            share the OS page cache); the file stays mapped while data references it.
+
+            Examples
+            --------
+            >>> ds.read_cache(columns=["YMTH", "Riders"], filters=pl.col("YMTH") == 202501)  # doctest: +SKIP
+        """
         # h = "HASH"  # TODO: file hash/metadata
         if self.metadata.get("load_with_geopandas", False):
             self.data = gpd.read_feather(  # TODO: test this
                 self.cache_path, *args, **kwargs
             )
             # self.logger.info(f"Cached file read (with geopandas): {self.version} {h}")
-        else:
-            self.data = pl.read_ipc(self.cache_path, *args, **kwargs)
+        elif (
+            columns is None
+            and filters is None
+            and ymth_range is None
+            and not lazy
+            and not self.cache_partition_by
+        ):
+            if self.cache_format == "parquet":
+                self.data = pl.read_parquet(self.cache_path, *args, **kwargs)
+            else:
+                # Don't rechunk (copy) memory-mapped data
+                kwargs.setdefault("rechunk", not memory_map)
+                self.data = pl.read_ipc(
+                    self.cache_path, *args, memory_map=memory_map, **kwargs
+                )
             # self.logger.info(f"Cached file read: {self.version} {h}")  # TODO: file hash
-
-        # Load cache metadata
-        # TODO: json.load(.../cached/.metadata/{filename}) -> bolt.config.metadata[filename]
+        else:
+            lf = self.scan_cache(ymth_range)
+            if filters is not None:
+                lf = lf.filter(filters)
+            if columns is not None:
+                lf = lf.select(columns)
+            self.data = lf if lazy else lf.collect()
         return self
 
     def read_table(self):
@@ -221,31 +620,181 @@ class Datasource[T](ABC):
         db.close()
         return
 
-    def validate(self):
-        """Describe the rules that the data must adhere to before exported via `load`."""
-        pass
+    def validate(
+        self, data: pl.DataFrame | pl.LazyFrame | None = None
+    ) -> Report | None:
+        """Checks data (default `data`) against the datasource's `rules`.
+
+        All rules are checked in a single pass. Set `validation_sample` in the
+        metadata to only check a sample of rows (a number or a share of rows).
+        Raises a `ValidationError` if any "error" rule is violated.
+        """
+        if not self.rules:
+            return None
+        data = self.data if data is None else data
+        report = check(data, self.rules, self.metadata.get("validation_sample"))
+        for row in report.failed().iter_rows(named=True):
+            log = (
+                self.logger.error if row["severity"] == "error" else self.logger.warning
+            )
+            log(f"Rule {row['rule']}: {row['violations']:,} of {row['rows']:,} rows")
+        self.logger.info(f"Checked {len(self.rules)} rules ({report.seconds:.2f}s)")
+        if not report.passed:
+            failed = report.failed().filter(pl.col("severity") == "error")["rule"]
+            raise ValidationError(f"{self.name} violates rules: {failed.to_list()}")
+        return report
 
     def output_schema(self):
         """Outputs the schema of the datasource."""
         if self.data is None:
             self.read_cache()
+        if isinstance(self.data, pl.LazyFrame):
+            columns, dtypes = zip(*self.data.collect_schema().items())
+        else:
+            columns, dtypes = self.data.columns, self.data.dtypes
         schema = (
-            pl.DataFrame(
-                dict(zip(self.data.columns, [str(i) for i in self.data.dtypes]))
-            )
+            pl.DataFrame(dict(zip(columns, [str(i) for i in dtypes])))
             .transpose(include_header=True)
             .rename({"column_0": "dtype"})
         )
         return schema
 
-    def update(self, download=True):
-        """Convenience method to combine Extract, Transform, and Cache methods."""
+    def _part_path(self, source_file: str) -> Path:
+        """Path of the cached (transformed) data of a single source file."""
+        key = sha256(source_file.encode("UTF8")).hexdigest()[:16]
+        return self.parts_dir.joinpath(f"{key}.arrow")
+
+    def _updated_data(self, lazy=False) -> T:
+        """Gets the data returned by `update` (the same kind whether or not updated)."""
+        if self.metadata.get("load_with_geopandas", False):
+            return self.read_cache().data if self.data is None else self.data
+        if lazy:
+            return self.scan_cache()
+        if self.data is None or isinstance(self.data, pl.LazyFrame):
+            return self.read_cache().data
+        return self.data
+
+    def update_incremental(self, download=True, lazy=False):
+        """Extract and transform only new or changed source files.
+
+        Each source file is transformed separately and its result is cached as a
+        "part" (replacing the part of a changed file). The cache is then rebuilt
+        from all parts. A manifest of source files (path, size, modification time,
+        and hash) is used to find the new, changed, and removed files.
+        Returns the data like `update`.
+        """
+        self.logger.info("Beginning incremental update process")
+        if download:
+            self._download()
+        start = time.perf_counter()
+        previous = Manifest.load(self.manifest_path)
+        metadata = self.read_cache_metadata()
+        if not self.cache_path.exists() or (
+            metadata and metadata.datasource_hash != self.code_hash()
+        ):
+            # Re-make all parts (e.g. the transform may have changed)
+            previous = Manifest()
+        current = Manifest.from_files(self.source_files, previous, HASH_ALGORITHM)
+        added, changed, removed = previous.diff(current)
+        self.logger.info(
+            f"Source files: {len(added)} added, {len(changed)} changed, "
+            f"{len(removed)} removed"
+        )
+        # Cache partitions affected by new, changed, or removed source files
+        touched = set()
+        col = self.cache_partition_by
+
+        def part_values(p: str) -> set:
+            lf = pl.scan_ipc(self._part_path(p))
+            return set(lf.select(pl.col(col).unique()).collect()[col])
+
+        for p in removed + changed:
+            if col and self._part_path(p).exists():
+                touched |= part_values(p)
+        # Remove parts of removed source files
+        for p in removed:
+            self._part_path(p).unlink(missing_ok=True)
+        # Extract, transform and cache each new or changed source file
+        self.parts_dir.mkdir(parents=True, exist_ok=True)
+        for p in added + changed:
+            self.extract(files=[p])
+            self.transform()
+            if isinstance(self.data, pl.LazyFrame):
+                # Validate the written part, so the query isn't run twice; the
+                #  previous part is only replaced if it passes
+                tmp_path = self._part_path(p).with_suffix(".tmp")
+                try:
+                    self.data.sink_ipc(
+                        tmp_path, compression="uncompressed", engine="streaming"
+                    )
+                    self._validate_written(pl.scan_ipc(tmp_path, memory_map=False))
+                    tmp_path.replace(self._part_path(p))
+                finally:
+                    tmp_path.unlink(missing_ok=True)
+            elif isinstance(self.data, pl.DataFrame):
+                self.validate()
+                self.data.write_ipc(self._part_path(p))
+            else:
+                raise TypeError("Incremental updates require a polars DataFrame")
+            if col:
+                touched |= part_values(p)
+        self.timings["extract_transform"] = time.perf_counter() - start
+        # Only appended parts can be inserted into an existing table; with no new
+        #  parts (e.g. a previous load failed after the manifest was saved), the
+        #  whole table is replaced
+        self.appended_parts = None
+        if added and not changed and not removed and previous.files:
+            self.appended_parts = [self._part_path(p) for p in added]
+        # Rebuild cache from all parts
+        if added or changed or removed or not self.cache_path.exists():
+            parts = [self._part_path(p) for p in current.files]
+            self.data = pl.concat(
+                [pl.scan_ipc(p) for p in parts], how="vertical_relaxed"
+            )
+            if col and previous.files:
+                # Only re-write the affected partitions
+                self.data = self.data.filter(pl.col(col).is_in(list(touched)))
+                self.write_cache(replace=touched)
+                self.data = self.scan_cache()
+            else:
+                self.write_cache()
+        else:
+            self.read_cache()
+            if metadata is None:
+                self.write_cache_metadata()
+        current.dump(self.manifest_path)
+        self.logger.info("Incremental update complete")
+        return self._updated_data(lazy)
+
+    def update(self, download=True, force=False, lazy=False):
+        """Convenience method to combine Extract, Transform, and Cache methods.
+
+        Unless `force` is True, the update is skipped (and the cache is read)
+        if the cache is fresh after downloading; see `is_cache_fresh`.
+        Returns the data (a GeoDataFrame for spatial data) whether or not the
+        update was skipped: a LazyFrame scan of the cache if `lazy`, otherwise
+        a DataFrame.
+        """
+        self.timings = {}
+        if download:
+            self._download()
+        if not force and self.is_cache_fresh():
+            self.logger.info("Cache is up to date; skipped update")
+            return self._updated_data(lazy)
+        if self.incremental:
+            return self.update_incremental(download=False, lazy=lazy)
         self.logger.info("Beginning full update process")
-        if hasattr(self, "download") and download:
-            self.logger.info("'download' method found and running")
-            self.download()
-        self.extract()
-        self.transform()
-        self.write_cache()
+        for step in (self.extract, self.transform):
+            start = time.perf_counter()
+            step()
+            self.timings[step.__name__] = time.perf_counter() - start
+        # Lazy data is validated once it is written (see `write_cache`), so the
+        #  query isn't run twice
+        lazy_data = isinstance(self.data, pl.LazyFrame)
+        if not lazy_data:
+            start = time.perf_counter()
+            self.validate()
+            self.timings["validate"] = time.perf_counter() - start
+        self.write_cache(validate=lazy_data)
         self.logger.info("Update complete")
-        return self.data
+        return self._updated_data(lazy)
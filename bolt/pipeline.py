@@ -0,0 +1,206 @@
+"""Functions for running datasource updates (in serial or in parallel)."""
+
+import multiprocessing
+import time
+from concurrent.futures import FIRST_COMPLETED, Future, ProcessPoolExecutor, wait
+from dataclasses import dataclass
+from graphlib import TopologicalSorter
+from pathlib import Path
+from typing import Any, Iterable, Iterator, Literal
+
+import geopandas as gpd
+import pandas as pd
+import polars as pl
+
+from bolt import datasources
+from bolt.utils import config, stat_path
+
+
+@dataclass
+class UpdateResult:
+    """The outcome of a single datasource update."""
+
+    name: str
+    cache_path: Path | None = None
+    # How the processed data should be loaded into the warehouse (None if no data)
+    kind: Literal["spatial", "table", "append"] | None = None
+    # Cached parts to insert into the existing table (kind="append")
+    parts: list[Path] | None = None
+    seconds: float = 0.0
+    # Processed data; only kept for in-process updates (never sent between processes)
+    data: Any = None
+    error: Exception | None = None
+    # Not updated (sources and upstream datasources unchanged)
+    skipped: bool = False
+    # Whether the cache was re-written by the update (False if skipped)
+    changed: bool = True
+
+
+def _cache_signature(d: datasources.Datasource) -> tuple | None:
+    """Gets the size, modification time, and row count of a datasource's cache.
+
+    Used to tell whether an update re-wrote the cache without re-reading it
+    (None if there is no cache).
+    """
+    if not d.cache_path.exists():
+        return None
+    metadata = d.read_cache_metadata()
+    return (*stat_path(d.cache_path), metadata.row_count if metadata else None)
+
+
+def update_datasource(
+    name: str, download=True, keep_data=False, track_changes=False, force=True
+) -> UpdateResult:
+    """Runs the full update (download, extract, transform, cache) of a datasource.
+
+    Only the datasource name is passed in and only a small `UpdateResult` is
+    returned, so this function is safe to run in a worker process.
+    With `track_changes`, the cache is compared (size, modification time, and row
+    count) before and after the update so that dependent datasources are only
+    re-run if the cache was re-written.
+    By default the update is `force`d, since the caller has already decided that
+    the datasource is stale; see `Datasource.is_cache_fresh`.
+    """
+    start = time.perf_counter()
+    d = getattr(datasources, name)()
+    old_signature = _cache_signature(d) if track_changes else None
+    # Loaded into the warehouse from the cache (see `warehouse.load_datasource`)
+    data = d.update(download, force=force, lazy=True)
+    kind = None
+    if isinstance(data, gpd.GeoDataFrame):
+        kind = "spatial"
+    elif isinstance(data, (pl.DataFrame, pl.LazyFrame, pd.DataFrame)):
+        kind = "table" if d.appended_parts is None else "append"
+    return UpdateResult(
+        name=name,
+        cache_path=d.cache_path,
+        kind=kind,
+        parts=d.appended_parts,
+        seconds=time.perf_counter() - start,
+        data=data if keep_data else None,
+        changed=not track_changes or old_signature != _cache_signature(d),
+    )
+
+
+def get_dependency_graph(names: Iterable[str]) -> dict[str, set[str]]:
+    """Makes a graph of datasources and the datasources they depend on.
+
+    Dependencies are declared with the `depends_on` key of a datasource's
+    metadata (config.toml). Only dependencies within `names` are included.
+    """
+    names = list(names)
+    graph: dict[str, set[str]] = {}
+    for name in names:
+        depends_on: str | list[str] = config.metadata[name].get("depends_on", [])
+        if isinstance(depends_on, str):
+            depends_on = [depends_on]
+        for dep in depends_on:
+            if dep not in config.metadata:
+                raise KeyError(f"'{name}' depends on unknown datasource '{dep}'")
+        graph[name] = {dep for dep in depends_on if dep in names}
+    return graph
+
+
+def update_graph(
+    graph: dict[str, set[str]],
+    stale: Iterable[str],
+    jobs: int = 1,
+    download: bool | Iterable[str] = True,
+) -> Iterator[UpdateResult]:
+    """Updates datasources in dependency order, yielding results as they complete.
+
+    Datasources run as soon as all of their dependencies have finished (in a pool
+    of `jobs` worker processes if `jobs` > 1). A datasource is only updated if it
+    is `stale` (e.g. its source files changed) or if the output of one of its
+    dependencies changed; otherwise a skipped result is yielded. Datasources that
+    depend on a failed datasource are not updated and yield an error.
+    Errors are returned on the result (`UpdateResult.error`) rather than raised.
+    `download` may be the names of the datasources to download (e.g. if the
+    others were already downloaded).
+    """
+    stale = set(stale)
+    if not isinstance(download, bool):
+        download = set(download)
+    sorter = TopologicalSorter(graph)
+    sorter.prepare()  # Raises graphlib.CycleError
+    dependents: dict[str, set[str]] = {name: set() for name in graph}
+    for name, deps in graph.items():
+        for dep in deps:
+            dependents[dep].add(name)
+    changed: set[str] = set()
+    failed: set[str] = set()
+
+    def finish(result: UpdateResult) -> UpdateResult:
+        if result.error:
+            failed.add(result.name)
+        elif not result.skipped and result.changed:
+            changed.add(result.name)
+        sorter.done(result.name)
+        return result
+
+    executor = None
+    if jobs > 1:
+        # Forking a process that has started polars/duckdb threads can deadlock
+        ctx = multiprocessing.get_context("spawn")
+        executor = ProcessPoolExecutor(max_workers=jobs, mp_context=ctx)
+    running: dict[Future, str] = {}
+    try:
+        while sorter.is_active():
+            for name in sorter.get_ready():
+                if graph[name] & failed:
+                    err = RuntimeError(
+                        f"Dependencies failed: {sorted(graph[name] & failed)}"
+                    )
+                    yield finish(UpdateResult(name=name, error=err))
+                    continue
+                if name not in stale and not graph[name] & changed:
+                    yield finish(UpdateResult(name=name, skipped=True, changed=False))
+                    continue
+                track_changes = bool(dependents[name])
+                should_download = (
+                    download if isinstance(download, bool) else name in download
+                )
+                if executor is None:
+                    try:
+                        result = update_datasource(
+                            name,
+                            should_download,
+                            keep_data=True,
+                            track_changes=track_changes,
+                        )
+                    except Exception as e:
+                        result = UpdateResult(name=name, error=e)
+                    yield finish(result)
+                else:
+                    future = executor.submit(
+                        update_datasource, name, should_download, False, track_changes
+                    )
+                    running[future] = name
+            if not running:
+                continue
+            done, _ = wait(running, return_when=FIRST_COMPLETED)
+            for future in done:
+                name = running.pop(future)
+                try:
+                    result = future.result()
+                except Exception as e:
+                    result = UpdateResult(name=name, error=e)
+                yield finish(result)
+    finally:
+        # Don't start queued updates if the caller stops early (e.g. on error)
+        if executor is not None:
+            executor.shutdown(wait=True, cancel_futures=True)
+
+
+def update_many(
+    names: Iterable[str], jobs: int = 1, download: bool | Iterable[str] = True
+) -> Iterator[UpdateResult]:
+    """Updates many (independent) datasources, yielding results as each completes.
+
+    With `jobs` > 1, datasources are updated in a pool of worker processes.
+    Results are yielded in completion order so that the caller can act as the
+    single writer to the warehouse.
+    Errors are returned on the result (`UpdateResult.error`) rather than raised.
+    """
+    names = list(names)
+    yield from update_graph({name: set() for name in names}, names, jobs, download)
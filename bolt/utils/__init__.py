@@ -1,12 +1,16 @@
 from . import (
     funcs,
+    rules,
     schema,
     version,
 )
 from ._config import CONFIG_PATH, Config
-from ._download import download
+from ._download import download, download_many
+from ._hashing import hash_file, hash_path, hash_paths, stat_path
 from ._logger import make_logger
+from ._manifest import Manifest
 from ._rich import df_to_table
+from ._sql_dependency_sorter import get_sql_dependency_graph, get_sql_file_dependencies
 from ._yearmonth import YearMonth
 
 config = Config()
@@ -18,9 +22,18 @@ __all__ = [
     "CONFIG_PATH",
     "df_to_table",
     "download",
+    "download_many",
     "funcs",
+    "get_sql_dependency_graph",
+    "get_sql_file_dependencies",
+    "hash_file",
+    "hash_path",
+    "hash_paths",
     "make_logger",
+    "Manifest",
+    "rules",
     "schema",
+    "stat_path",
     # ...
     "version",
     "YearMonth",
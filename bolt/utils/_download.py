@@ -1,51 +1,238 @@
-from io import BytesIO
+"""Streaming, resumable downloads.
+
+Files are streamed to disk in chunks (never fully loaded into memory), partial
+downloads are resumed with HTTP range requests, and files that haven't changed
+since the last download are skipped with conditional requests (ETag /
+Last-Modified). ZIP files are extracted member by member, streaming to disk.
+
+Temporary files start with "~" and download state files with "_", so neither
+are datasource source files (see `Datasource.source_files`).
+"""
+
+import json
+import shutil
+from concurrent.futures import ThreadPoolExecutor
 from pathlib import Path
-from urllib.request import urlopen
+from urllib.error import HTTPError
+from urllib.parse import unquote, urlparse
+from urllib.request import Request, urlopen
 from zipfile import ZipFile
 
+# Read/write in chunks of this many bytes
+CHUNK_SIZE = 1024 * 1024
+# Seconds to wait for a connection (or data) before failing
+TIMEOUT = 60
+
+
+def _temp_path(path: Path, suffix: str) -> Path:
+    return path.with_name(f"~{path.name}{suffix}")
+
+
+def _write_json(path: Path, obj: dict) -> None:
+    """Writes JSON to a temporary file and swaps, so it is never partially written."""
+    tmp_path = _temp_path(path, ".tmp")
+    tmp_path.write_text(json.dumps(obj, indent=2))
+    tmp_path.replace(path)
+    return
+
+
+def _read_json(path: Path) -> dict:
+    try:
+        return json.loads(path.read_text())
+    except (FileNotFoundError, json.JSONDecodeError):
+        return {}
+
+
+def url_filename(url: str) -> str:
+    """Gets the filename of a URL (ignoring any query string)."""
+    return unquote(Path(urlparse(url).path).name)
+
+
+def fetch(
+    url: str,
+    path: Path,
+    validators: dict | None = None,
+    resume=True,
+    chunk_size: int = CHUNK_SIZE,
+    timeout: float = TIMEOUT,
+) -> dict | None:
+    """Streams a URL to a file.
 
-def memory_unzip(payload) -> list[tuple[str, bytes]]:
-    """Unzip the contents of a payload, preserving directory structure."""
-    unzipped_payload: list[tuple[str, bytes]] = []
-    with ZipFile(BytesIO(payload), "r") as zf:
-        # Handle multiple files in zipped payload
-        for filename in zf.namelist():
+    The file is first written to '~{name}.part' and then swapped in. If a
+    previous download of the same URL was interrupted, it is resumed (if the
+    server supports range requests and the file hasn't changed).
+
+    Parameters
+    ----------
+    url : str
+        The URL to download.
+    path : Path
+        The file to write.
+    validators : dict | None
+        The "etag" and/or "last_modified" of the previous download (from a
+        previous result); the file is only downloaded if it has changed.
+    resume : bool
+        Resume an interrupted download.
+
+    Returns
+    -------
+    dict | None
+        The URL, "etag", and "last_modified" of the download (for future
+        `validators`), or None if the file has not changed.
+    """
+    part = _temp_path(path, ".part")
+    part_meta_path = _temp_path(path, ".part.json")
+    headers: dict[str, str] = {}
+    offset = 0
+    part_meta = _read_json(part_meta_path) if resume and part.exists() else {}
+    if_range = part_meta.get("etag") or part_meta.get("last_modified")
+    if part_meta.get("url") == url and if_range:
+        offset = part.stat().st_size
+        headers["Range"] = f"bytes={offset}-"
+        # The server sends the whole file if it changed since the partial download
+        headers["If-Range"] = if_range
+    elif validators:
+        if validators.get("etag"):
+            headers["If-None-Match"] = validators["etag"]
+        if validators.get("last_modified"):
+            headers["If-Modified-Since"] = validators["last_modified"]
+    try:
+        response = urlopen(Request(url, headers=headers), timeout=timeout)
+    except HTTPError as e:
+        if e.code == 304:
+            return None
+        if e.code == 416 and offset:
+            # Range not satisfiable (e.g. the file shrank); start over
+            part.unlink()
+            part_meta_path.unlink(missing_ok=True)
+            return fetch(url, path, validators, False, chunk_size, timeout)
+        raise
+    with response:
+        result = {
+            "url": url,
+            "etag": response.headers.get("ETag"),
+            "last_modified": response.headers.get("Last-Modified"),
+        }
+        if response.status != 206:
+            offset = 0
+        length = response.headers.get("Content-Length")
+        expected = offset + int(length) if length is not None else None
+        path.parent.mkdir(parents=True, exist_ok=True)
+        _write_json(part_meta_path, result)
+        with part.open("ab" if offset else "wb") as f:
+            f.truncate(offset)
+            shutil.copyfileobj(response, f, chunk_size)
+    if expected is not None and part.stat().st_size != expected:
+        # Keep the partial download to resume later
+        raise IOError(f"Incomplete download ({part.stat().st_size}/{expected}): {url}")
+    part.replace(path)
+    part_meta_path.unlink(missing_ok=True)
+    return result
+
+
+def unzip_file(path: Path, out_dir: Path, chunk_size: int = CHUNK_SIZE) -> list[str]:
+    """Extracts a ZIP file (streaming each member to disk), preserving directories.
+
+    Returns
+    -------
+    list[str]
+        The names of the extracted files (relative to `out_dir`).
+    """
+    out_dir = Path(out_dir)
+    root = out_dir.resolve()
+    names: list[str] = []
+    with ZipFile(path, "r") as zf:
+        for info in zf.infolist():
             # Skip directory entries in zip file
-            if filename.endswith("/"):
+            if info.is_dir():
                 continue
-            # Open the zipped files and extract each
-            with zf.open(filename) as file_obj:
-                t = (filename, file_obj.read())
-                unzipped_payload.append(t)
-    return unzipped_payload
+            full_path = out_dir / info.filename
+            if not full_path.resolve().is_relative_to(root):
+                raise ValueError(
+                    f"ZIP member is outside of '{out_dir}': {info.filename}"
+                )
+            full_path.parent.mkdir(parents=True, exist_ok=True)
+            # Write to a temporary file and swap, so a file is never partially written
+            tmp_path = _temp_path(full_path, ".tmp")
+            with zf.open(info) as src, tmp_path.open("wb") as dst:
+                shutil.copyfileobj(src, dst, chunk_size)
+            tmp_path.replace(full_path)
+            names.append(info.filename)
+    return names
+
 
+def download(
+    url: str,
+    out_dir: Path,
+    unzip=True,
+    conditional=True,
+    resume=True,
+    chunk_size: int = CHUNK_SIZE,
+    timeout: float = TIMEOUT,
+) -> Path:
+    """Download and extract files, preserving directory structure.
 
-def download(url: str, out_dir: Path, unzip=True):
-    """Download and extract files, preserving directory structure."""
+    The ETag / Last-Modified of each download is kept in
+    '{out_dir}/_{filename}.download.json'. With `conditional`, the URL is only
+    downloaded again if it has changed (and the files from the last download
+    still exist). Interrupted downloads are resumed (see `fetch`).
+    """
+    out_dir = Path(out_dir)
     # Ensure output directory exists
     out_dir.mkdir(parents=True, exist_ok=True)
+    filename = url_filename(url)
+    is_zip = unzip and filename.lower().endswith(".zip")
+    state_path = out_dir / f"_{filename}.download.json"
+    state = _read_json(state_path)
+    validators = None
+    if (
+        conditional
+        and state.get("url") == url
+        and all((out_dir / f).exists() for f in state.get("files", []))
+    ):
+        validators = state
 
-    # Get the payload to download
-    payload: bytes = urlopen(url).read()
+    # The ZIP file is only kept until it is extracted
+    path = out_dir / (f"~{filename}" if is_zip else filename)
+    result = fetch(url, path, validators, resume, chunk_size, timeout)
+    if result is None:
+        # Not modified
+        return out_dir
+    files = [filename]
+    if is_zip:
+        files = unzip_file(path, out_dir, chunk_size)
+        path.unlink()
+    _write_json(state_path, {**result, "files": files})
+    return out_dir
 
-    # Determine if the payload should be unzipped (in-memory)
-    if unzip and url.endswith(".zip"):
-        # Unzip the payload in-memory
-        payload: list[bytes] = memory_unzip(payload)
 
-    if isinstance(payload, list):
-        for filename, file_content in payload:
-            # Create full path including any subdirectories
-            full_path = out_dir / filename
-            # Create parent directories if they don't exist
-            full_path.parent.mkdir(parents=True, exist_ok=True)
-            # Write the file
-            with full_path.open("wb") as f:
-                f.write(file_content)
-    else:
-        # Handle non-zip files
-        filename = url.split("/")[-1]
-        with (out_dir / filename).open("wb") as f:
-            f.write(payload)
+def download_many(
+    downloads: list[tuple[str, Path]], max_workers: int = 4, **kwargs
+) -> dict[str, Path | Exception]:
+    """Downloads many URLs concurrently (in a pool of threads).
 
-    return out_dir
+    Parameters
+    ----------
+    downloads : list[tuple[str, Path]]
+        URLs and the directory to download each to.
+    max_workers : int
+        The number of concurrent downloads.
+    **kwargs
+        Passed to `download`.
+
+    Returns
+    -------
+    dict[str, Path | Exception]
+        The output directory of each URL, or the error if it failed (errors are
+        returned rather than raised so that one failure doesn't stop the rest).
+    """
+
+    def run(url: str, out_dir: Path) -> Path | Exception:
+        try:
+            return download(url, out_dir, **kwargs)
+        except Exception as e:
+            return e
+
+    with ThreadPoolExecutor(max_workers=max_workers) as executor:
+        futures = {url: executor.submit(run, url, d) for url, d in downloads}
+    return {url: future.result() for url, future in futures.items()}
@@ -0,0 +1,78 @@
+"""Functions for hashing (source) files."""
+
+import hashlib
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+
+try:
+    import xxhash
+except ImportError:  # Optional; only required for "xxh*" algorithms
+    xxhash = None
+
+# Read files in chunks of this many bytes (so large files are never fully loaded)
+CHUNK_SIZE = 1024 * 1024
+
+
+def new_hasher(algorithm: str = "sha256"):
+    """Gets a new hash object by name.
+
+    Any algorithm in `hashlib` is supported, as well as the (much faster,
+    non-cryptographic) "xxh64", "xxh3_64", and "xxh3_128" if `xxhash` is installed.
+    """
+    if algorithm.startswith("xxh"):
+        if xxhash is None:
+            raise ImportError(f"The 'xxhash' package is required to use '{algorithm}'")
+        return getattr(xxhash, algorithm)()
+    return hashlib.new(algorithm)
+
+
+def hash_file(
+    path: str | Path, algorithm: str = "sha256", chunk_size: int = CHUNK_SIZE
+) -> str:
+    """Gets the hash of a file (read in chunks)."""
+    h = new_hasher(algorithm)
+    with Path(path).open("rb") as f:
+        for chunk in iter(lambda: f.read(chunk_size), b""):
+            h.update(chunk)
+    return h.hexdigest()
+
+
+def hash_path(path: str | Path, algorithm: str = "sha256") -> str:
+    """Gets the hash of a file, or of all files in a directory (e.g. a '.gdb')."""
+    path = Path(path)
+    if not path.is_dir():
+        return hash_file(path, algorithm)
+    h = new_hasher(algorithm)
+    for p in sorted(i for i in path.rglob("*") if i.is_file()):
+        h.update(p.relative_to(path).as_posix().encode("UTF8"))
+        h.update(hash_file(p, algorithm).encode("UTF8"))
+    return h.hexdigest()
+
+
+def stat_path(path: str | Path) -> tuple[int, float]:
+    """Gets the size and modification time of a file, or of all files in a directory.
+
+    For directories, the modification time is the latest of all files and
+    (sub)directories, since adding, removing, or renaming a file updates the
+    modification time of its directory (but not of the file).
+    """
+    path = Path(path)
+    if not path.is_dir():
+        stat = path.stat()
+        return (stat.st_size, stat.st_mtime)
+    files, dirs = [], [path.stat()]
+    for i in path.rglob("*"):
+        (dirs if i.is_dir() else files).append(i.stat())
+    return (
+        sum(i.st_size for i in files),
+        max(i.st_mtime for i in files + dirs),
+    )
+
+
+def hash_paths(
+    paths: list[str], algorithm: str = "sha256", max_workers: int | None = None
+) -> dict[str, str]:
+    """Hashes many files (or directories) in a pool of threads."""
+    with ThreadPoolExecutor(max_workers=max_workers) as executor:
+        hashes = executor.map(lambda p: hash_path(p, algorithm), paths)
+        return dict(zip(paths, hashes))
@@ -0,0 +1,86 @@
+"""Manifests of source files (used to detect changes)."""
+
+import json
+from pathlib import Path
+
+from pydantic import BaseModel
+
+from ._hashing import hash_paths, stat_path
+
+
+class SourceFile(BaseModel):
+    path: str
+    size: int
+    mtime: float
+    hash: str
+
+
+class Manifest(BaseModel):
+    """The source files (and their hashes) used to create a datasource's cache."""
+
+    algorithm: str = "sha256"
+    files: dict[str, SourceFile] = {}
+
+    @classmethod
+    def load(cls, path: Path) -> "Manifest":
+        """Loads a manifest from a JSON file (empty if the file doesn't exist)."""
+        if not path.exists():
+            return cls()
+        with path.open() as f:
+            return cls.model_validate(json.load(f))
+
+    def dump(self, path: Path) -> None:
+        """Writes the manifest to a JSON file."""
+        path.parent.mkdir(parents=True, exist_ok=True)
+        # Write to a temporary file and swap, so a manifest is never partially written
+        tmp_path = path.with_suffix(".tmp")
+        with tmp_path.open("w") as f:
+            f.write(self.model_dump_json(indent=2))
+        tmp_path.replace(path)
+        return
+
+    @classmethod
+    def from_files(
+        cls,
+        paths: list[str],
+        previous: "Manifest | None" = None,
+        algorithm: str = "sha256",
+    ) -> "Manifest":
+        """Makes a manifest of files (or directories, e.g. a '.gdb').
+
+        Files with the same size and modification time as in the `previous`
+        manifest are assumed to be unchanged and are not re-read. All other files
+        are hashed (in chunks) in a pool of threads.
+        """
+        if previous and previous.algorithm != algorithm:
+            previous = None
+        files = {}
+        to_hash: dict[str, tuple[int, float]] = {}
+        for p in sorted(paths):
+            size, mtime = stat_path(p)
+            old = previous.files.get(p) if previous else None
+            if old and old.size == size and old.mtime == mtime:
+                files[p] = old
+            else:
+                to_hash[p] = (size, mtime)
+        for p, h in hash_paths(list(to_hash), algorithm).items():
+            size, mtime = to_hash[p]
+            files[p] = SourceFile(path=p, size=size, mtime=mtime, hash=h)
+        return cls(algorithm=algorithm, files=dict(sorted(files.items())))
+
+    def diff(self, other: "Manifest") -> tuple[list[str], list[str], list[str]]:
+        """Compares this (previous) manifest to another (current) manifest.
+
+        Returns
+        -------
+        tuple[list[str], list[str], list[str]]
+            The paths of files that were added, changed, and removed.
+        """
+        added = [p for p in other.files if p not in self.files]
+        removed = [p for p in self.files if p not in other.files]
+        changed = [
+            p
+            for p, f in other.files.items()
+            if p in self.files and self.files[p].hash != f.hash
+        ]
+        return (added, changed, removed)
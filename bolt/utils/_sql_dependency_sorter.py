@@ -1,41 +1,61 @@
 """Sort SQL file dependencies."""
 
 import re
-from pathlib import Path
-
 from graphlib import TopologicalSorter
+from pathlib import Path
 
-sql_dir = Path(r"C:\Workspace\tmpdb\Data\__bolt__\sql")  # TODO: use config
-sql_files = list(sql_dir.glob("*.sql"))
+regex = re.compile(
+    r"(?:FROM|JOIN|UPDATE|INSERT INTO|PIVOT)\s+(\b\w+(?:_\w+)*\b)", flags=re.IGNORECASE
+)
+create_regex = re.compile(
+    r"CREATE\s+(?:OR\s+REPLACE\s+)?(?:TEMP\w*\s+)?(?:VIEW|TABLE)\s+"
+    r"(?:IF\s+NOT\s+EXISTS\s+)?(\b\w+\b)",
+    flags=re.IGNORECASE,
+)
 
-regex = re.compile(r"(?:FROM|JOIN|UPDATE|INSERT INTO|PIVOT) (\b\w+(?:_\w+)*\b)")
 
+def parse_sql_file(file: Path) -> tuple[set[str], set[str]]:
+    """Opens, cleans, and parses an SQL file for the tables/views it creates and requires.
 
-def parse_sql_file(file: Path):
-    """Opens, cleans, and parses an SQL file for required tables/views."""
-    fname = file.name.split(".")[0]
+    Names are lowercase. If a file creates no tables/views, its name is used
+    (e.g. 'view_all_tables.sql' creates 'view_all_tables').
+    """
     with file.open() as f:
         sql = f.read()
     # Remove comments
     sql = re.sub(r"/\*.*?\*/", "", sql, flags=re.DOTALL)
     sql = re.sub(r"^\s*--.*$", "", sql, flags=re.MULTILINE)
-    return (
-        fname,
-        {dep for dep in regex.findall(sql) if dep.lower() not in fname.lower()},
-    )
-
-
-def get_sql_file_dependencies():
+    creates = {name.lower() for name in create_regex.findall(sql)}
+    if not creates:
+        creates = {file.name.split(".")[0].lower()}
+    requires = {dep.lower() for dep in regex.findall(sql)} - creates
+    return (creates, requires)
+
+
+def get_sql_dependency_graph(
+    sql_files: list[Path],
+) -> tuple[dict[Path, set[Path]], dict[Path, set[str]]]:
+    """Makes a graph of SQL files and the SQL files they depend on.
+
+    Returns
+    -------
+    tuple[dict[Path, set[Path]], dict[Path, set[str]]]
+        The graph (SQL file: SQL files it depends on), and the other tables
+        (e.g. datasources) that each SQL file requires.
+    """
+    parsed = {file: parse_sql_file(file) for file in sql_files}
+    created_by = {
+        name: file for file, (creates, _) in parsed.items() for name in creates
+    }
+    graph: dict[Path, set[Path]] = {}
+    tables: dict[Path, set[str]] = {}
+    for file, (_, requires) in parsed.items():
+        graph[file] = {created_by[i] for i in requires if i in created_by} - {file}
+        tables[file] = {i for i in requires if i not in created_by}
+    return (graph, tables)
+
+
+def get_sql_file_dependencies(sql_files: list[Path]) -> tuple[Path, ...]:
     """Sorts SQL files based on dependencies."""
-    d = dict(map(parse_sql_file, sql_files))
-    dependents = TopologicalSorter(d).static_order()
-    dependent_files = tuple(
-        f"{i.lower()}.sql"
-        for i in dependents
-        if sql_dir.joinpath(f"{i.lower()}.sql").exists()
-    )
-    return dependent_files
-
-
-if __name__ == "__main__":
-    print(get_sql_file_dependencies())
+    graph, _ = get_sql_dependency_graph(sql_files)
+    return tuple(TopologicalSorter(graph).static_order())
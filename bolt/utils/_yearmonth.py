@@ -5,20 +5,54 @@ from pathlib import Path
 import polars as pl
 
 
+def _expr(col: str | pl.Expr) -> pl.Expr:
+    """Gets an expression from a column name (or expression)."""
+    return pl.col(col) if isinstance(col, str) else col
+
+
 class YearMonth[T]:
+    """A year and month (e.g. 202401).
+
+    YearMonths are immutable and interned: `YearMonth(202401) is YearMonth(202401)`.
+    Adding/subtracting integers adds/subtracts months, and subtracting
+    YearMonths gives the number of months between them. For columns of YMTH
+    integers, use `YearMonth.range` and the `*_expr` methods (or the `ymth`
+    namespace) rather than many YearMonth objects.
+    """
+
+    __slots__ = ("_year", "_month", "_yearmonth")
     dtype = pl.Int64
+    # Interned instances by (class, YMTH)
+    _instances: dict[tuple[type, int], "YearMonth"] = {}
 
-    def __init__(self, yearmonth: str | int):
-        yearmonth_str = str(yearmonth)
-        if not re.match(r"^\d{6}$", yearmonth_str):
-            raise ValueError("YearMonth must be a 6-digit number (YYYYMM)")
+    def __new__(cls, yearmonth: str | int):
+        if isinstance(yearmonth, YearMonth):
+            yearmonth = yearmonth._yearmonth
+        if isinstance(yearmonth, int) and not isinstance(yearmonth, bool):
+            ymth = yearmonth
+            if not (100000 <= ymth <= 999999):
+                raise ValueError("YearMonth must be a 6-digit number (YYYYMM)")
+        else:
+            yearmonth_str = str(yearmonth)
+            if not re.match(r"^\d{6}$", yearmonth_str):
+                raise ValueError("YearMonth must be a 6-digit number (YYYYMM)")
+            ymth = int(yearmonth_str)
+        key = (cls, ymth)
+        self = cls._instances.get(key)
+        if self is not None:
+            return self
 
-        self._year = int(yearmonth_str[:4])
-        self._month = int(yearmonth_str[4:])
-        if not (1 <= self.month <= 12):
+        year, month = divmod(ymth, 100)
+        if not (1 <= month <= 12):
             raise ValueError("Month must be between 1 and 12")
+        self = super().__new__(cls)
+        self._year = year
+        self._month = month
+        self._yearmonth = ymth
+        return cls._instances.setdefault(key, self)
 
-        self._yearmonth = int(yearmonth_str)
+    def __reduce__(self):
+        return (type(self), (self._yearmonth,))
 
     @property
     def year(self) -> int:
@@ -38,18 +72,66 @@ class YearMonth[T]:
     @classmethod
     def from_date(cls, date: dt.date) -> T:
         """Converts a date (string) to a Year-Month."""
-        ymth = int(date.strftime("%Y%m"))
-        return cls(ymth)
+        return cls(date.year * 100 + date.month)
 
     @classmethod
     def from_date_series(cls, date_col: pl.Expr) -> pl.Expr:
-        return (
-            date_col.map_elements(
-                lambda x: int(cls.from_date(x)), return_dtype=cls.dtype
-            )
-            .cast(pl.Int64)
-            .alias("YMTH")
-        )
+        """Converts a date (or datetime) column to a YMTH column."""
+        return cls.from_date_expr(date_col).alias("YMTH")
+
+    # Polars expression helpers (also see the `ymth` namespace, e.g.
+    # `pl.col("Date").ymth.from_date()`); these never call Python per row
+
+    @staticmethod
+    def from_date_expr(date: str | pl.Expr) -> pl.Expr:
+        """Converts a date (or datetime) column to YMTH integers."""
+        date = _expr(date)
+        return (date.dt.year().cast(pl.Int64) * 100 + date.dt.month()).cast(pl.Int64)
+
+    @staticmethod
+    def year_expr(ymth: str | pl.Expr) -> pl.Expr:
+        """Gets the year of YMTH integers."""
+        return _expr(ymth) // 100
+
+    @staticmethod
+    def month_expr(ymth: str | pl.Expr) -> pl.Expr:
+        """Gets the month of YMTH integers."""
+        return _expr(ymth) % 100
+
+    @classmethod
+    def to_date_expr(cls, ymth: str | pl.Expr) -> pl.Expr:
+        """Gets the first date of the month of YMTH integers."""
+        return pl.date(cls.year_expr(ymth), cls.month_expr(ymth), 1)
+
+    @classmethod
+    def to_last_date_expr(cls, ymth: str | pl.Expr) -> pl.Expr:
+        """Gets the last date of the month of YMTH integers."""
+        return cls.to_date_expr(ymth).dt.month_end()
+
+    @classmethod
+    def add_months_expr(cls, ymth: str | pl.Expr, months: int | pl.Expr) -> pl.Expr:
+        """Adds (or subtracts) a number of months to YMTH integers."""
+        # Months since year 0 (e.g. 202401 -> 2024 * 12 + 0)
+        index = cls.year_expr(ymth) * 12 + cls.month_expr(ymth) - 1 + months
+        return (index // 12 * 100 + index % 12 + 1).cast(pl.Int64)
+
+    @classmethod
+    def fiscal_year_expr(cls, ymth: str | pl.Expr, label=False) -> pl.Expr:
+        """Gets the US Federal fiscal year of YMTH integers (July - June).
+
+        With `label`, fiscal years are strings like `funcs.fiscal_year` (e.g.
+        202407 -> 'FY25'); otherwise integers (e.g. 202407 -> 2025).
+        """
+        fy = cls.year_expr(ymth) + (cls.month_expr(ymth) >= 7).cast(pl.Int64)
+        if label:
+            return pl.lit("FY") + (fy % 100).cast(pl.Utf8).str.zfill(2)
+        return fy
+
+    @classmethod
+    def fiscal_quarter_expr(cls, ymth: str | pl.Expr) -> pl.Expr:
+        """Gets the US Federal fiscal quarter of YMTH integers (July - September is 1)."""
+        quarter = (cls.month_expr(ymth) - 1) // 3 + 1
+        return ((quarter + 1) % 4 + 1).cast(pl.Int8)
 
     @classmethod
     def from_date_string(cls, date_str: str, format: str) -> T:
@@ -65,7 +147,59 @@ class YearMonth[T]:
 
     @classmethod
     def from_ints(cls, year: int, month: int):
-        return cls(f"{year}{str(month).zfill(2)}")
+        if not (1 <= month <= 12):
+            raise ValueError("Month must be between 1 and 12")
+        return cls(year * 100 + month)
+
+    @classmethod
+    def from_index(cls, index: int):
+        """Makes a Year-Month from a number of months since year 0 (see `index`)."""
+        year, month = divmod(index, 12)
+        return cls(year * 100 + month + 1)
+
+    @property
+    def index(self) -> int:
+        """The number of months since year 0 (e.g. for month arithmetic)."""
+        return self._year * 12 + self._month - 1
+
+    @classmethod
+    def range(
+        cls, start: "int | YearMonth", end: "int | YearMonth", step: int = 1
+    ) -> pl.Series:
+        """Makes a Series of the YMTH integers from `start` to `end` (inclusive).
+
+        Use `.to_numpy()` or `.to_list()` for other array types.
+        """
+        start, end = cls(start), cls(end)
+        stop = end.index + (1 if step > 0 else -1)
+        index = pl.int_range(start.index, stop, step, dtype=pl.Int64)
+        return pl.select(
+            ((index // 12) * 100 + index % 12 + 1).alias("YMTH")
+        ).to_series()
+
+    @staticmethod
+    def is_valid_expr(ymth: str | pl.Expr) -> pl.Expr:
+        """Whether YMTH integers are valid (6 digits and month 1-12); null if null."""
+        ymth = _expr(ymth)
+        return ymth.is_between(100000, 999999) & (ymth % 100).is_between(1, 12)
+
+    @classmethod
+    def validate(cls, ymths: pl.Series) -> pl.Series:
+        """Checks that a Series of YMTH integers (or strings) is valid.
+
+        Raises
+        ------
+        ValueError
+            If any (non-null) values are not valid Year-Months.
+        """
+        values = ymths.cast(cls.dtype, strict=False)
+        valid = pl.DataFrame({"YMTH": values}).select(cls.is_valid_expr("YMTH"))
+        # Nulls are valid, unless they could not be cast (e.g. 'abcdef')
+        invalid = ymths.filter(~valid.to_series().fill_null(ymths.is_null()))
+        if len(invalid):
+            examples = invalid.unique(maintain_order=True).head(5).to_list()
+            raise ValueError(f"{len(invalid)} invalid Year-Months, e.g. {examples}")
+        return values
 
     def to_year_and_month(self) -> tuple[int, int]:
         """Returns a tuple of year and month."""
@@ -75,6 +209,21 @@ class YearMonth[T]:
         """Return an expression defining a YMTH column literal."""
         return pl.lit(self.yearmonth, dtype=self.dtype).cast(pl.Int64).alias(col_name)
 
+    def __add__(self, months: int) -> "YearMonth":
+        if not isinstance(months, int):
+            return NotImplemented
+        return self.from_index(self.index + months)
+
+    __radd__ = __add__
+
+    def __sub__(self, other: "int | YearMonth"):
+        """Subtracts months (int), or gets the months between two YearMonths."""
+        if isinstance(other, YearMonth):
+            return self.index - other.index
+        if not isinstance(other, int):
+            return NotImplemented
+        return self.from_index(self.index - other)
+
     def __eq__(self, other: object) -> bool:
         if not isinstance(other, YearMonth):
             raise TypeError("Type must be YearMonth")
@@ -111,3 +260,50 @@ class YearMonth[T]:
 
     def __int__(self):
         return int(self.yearmonth)
+
+
+@pl.api.register_expr_namespace("ymth")
+class YearMonthNamespace:
+    """Year-Month (YMTH integer) expressions, e.g. `pl.col("Date").ymth.from_date()`.
+
+    See the `YearMonth.*_expr` methods.
+    """
+
+    def __init__(self, expr: pl.Expr):
+        self._expr = expr
+
+    def from_date(self) -> pl.Expr:
+        """Converts a date (or datetime) column to YMTH integers."""
+        return YearMonth.from_date_expr(self._expr)
+
+    def year(self) -> pl.Expr:
+        """Gets the year of YMTH integers."""
+        return YearMonth.year_expr(self._expr)
+
+    def month(self) -> pl.Expr:
+        """Gets the month of YMTH integers."""
+        return YearMonth.month_expr(self._expr)
+
+    def to_date(self) -> pl.Expr:
+        """Gets the first date of the month of YMTH integers."""
+        return YearMonth.to_date_expr(self._expr)
+
+    def to_last_date(self) -> pl.Expr:
+        """Gets the last date of the month of YMTH integers."""
+        return YearMonth.to_last_date_expr(self._expr)
+
+    def add_months(self, months: int | pl.Expr) -> pl.Expr:
+        """Adds (or subtracts) a number of months to YMTH integers."""
+        return YearMonth.add_months_expr(self._expr, months)
+
+    def fiscal_year(self, label=False) -> pl.Expr:
+        """Gets the US Federal fiscal year of YMTH integers."""
+        return YearMonth.fiscal_year_expr(self._expr, label)
+
+    def fiscal_quarter(self) -> pl.Expr:
+        """Gets the US Federal fiscal quarter of YMTH integers."""
+        return YearMonth.fiscal_quarter_expr(self._expr)
+
+    def is_valid(self) -> pl.Expr:
+        """Whether YMTH integers are valid (6 digits and month 1-12)."""
+        return YearMonth.is_valid_expr(self._expr)
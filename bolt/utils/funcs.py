@@ -2,7 +2,10 @@
 
 
 def fiscal_year(year_month: int | str) -> str:
-    """Calculate a US Federal fiscal year from a YearMonth."""
+    """Calculate a US Federal fiscal year from a YearMonth.
+
+    In SQL, use the `fiscal_year` macro (see `bolt.warehouse.SQL_FUNCS`).
+    """
     year = int(str(year_month)[:4])
     month = int(str(year_month)[4:])
 
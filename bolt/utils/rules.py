@@ -0,0 +1,201 @@
+r"""Row-level data quality rules.
+
+Rules are compiled into a single `select` so that a table is scanned once,
+however many rules it has.
+
+Example
+-------
+>>> from bolt.utils import rules
+>>> RULES = [
+...     rules.not_null("Date"),
+...     rules.in_range("Value", min=0),
+...     rules.unique("Date", "Route"),
+...     rules.matches("Route", r"^\d{1,3}$"),
+...     rules.references("Route", "Routes"),  # Datasource 'Routes', column 'Route'
+... ]
+>>> rules.check(df, RULES)  # doctest: +SKIP
+"""
+
+import time
+from dataclasses import dataclass
+from typing import Any, Callable, Iterable, Literal
+
+import polars as pl
+
+# Name of the (temporary) row index column used for sampling
+_ROW_INDEX = "__row_index"
+
+
+class ValidationError(ValueError):
+    """Raised when data violates one or more rules."""
+
+
+@dataclass
+class Rule:
+    """A rule that each row of a table must follow.
+
+    `expr` is True for rows that violate the rule (nulls are not violations), or
+    a function that makes that expression when the rule is checked (e.g. to
+    load the values of another datasource).
+    """
+
+    name: str
+    expr: pl.Expr | Callable[[], pl.Expr]
+    severity: Literal["error", "warn"] = "error"
+
+    def violations(self) -> pl.Expr:
+        """Gets the expression for rows that violate the rule."""
+        expr = self.expr() if callable(self.expr) else self.expr
+        return expr.fill_null(False)
+
+
+@dataclass
+class Report:
+    """The result of checking rules against a table."""
+
+    # Rule name, severity, violations (count), and rows (checked)
+    results: pl.DataFrame
+    # Seconds to check all rules (one scan)
+    seconds: float
+    # Share of rows checked (None if all rows)
+    sample: float | None = None
+
+    @property
+    def passed(self) -> bool:
+        """Whether no "error" rules were violated."""
+        errors = self.results.filter(pl.col("severity") == "error")
+        return errors["violations"].sum() == 0
+
+    def failed(self) -> pl.DataFrame:
+        """Gets the results of rules with violations."""
+        return self.results.filter(pl.col("violations") > 0)
+
+
+def not_null(col: str, **kwargs) -> Rule:
+    """Values must not be null."""
+    return Rule(f"not_null({col})", pl.col(col).is_null(), **kwargs)
+
+
+def in_range(col: str, min: Any = None, max: Any = None, **kwargs) -> Rule:
+    """Values must be between `min` and `max` (inclusive; either may be None)."""
+    expr = pl.lit(False)
+    if min is not None:
+        expr = expr | (pl.col(col) < min)
+    if max is not None:
+        expr = expr | (pl.col(col) > max)
+    return Rule(f"in_range({col}, {min}, {max})", expr, **kwargs)
+
+
+def unique(*cols: str, **kwargs) -> Rule:
+    """Values (or combinations of values) must be unique; all duplicates violate.
+
+    When sampling, only duplicates within the sample are found.
+    """
+    expr = pl.col(cols[0]) if len(cols) == 1 else pl.struct(cols)
+    return Rule(f"unique({', '.join(cols)})", expr.is_duplicated(), **kwargs)
+
+
+def matches(col: str, pattern: str, **kwargs) -> Rule:
+    """String values must match a regular expression."""
+    return Rule(
+        f"matches({col}, {pattern!r})", ~pl.col(col).str.contains(pattern), **kwargs
+    )
+
+
+def is_in(col: str, values: Iterable, **kwargs) -> Rule:
+    """Values must be one of `values`."""
+    values = list(values)
+    return Rule(f"is_in({col})", ~pl.col(col).is_in(values), **kwargs)
+
+
+def references(col: str, datasource: str, column: str | None = None, **kwargs) -> Rule:
+    """Values must exist in a column (default `col`) of another datasource's cache.
+
+    The other datasource's values are read when the rule is checked.
+    """
+    column = column or col
+
+    def expr() -> pl.Expr:
+        from bolt import datasources
+
+        ds = getattr(datasources, datasource)()
+        values = ds.read_cache(columns=[column]).data[column].unique()
+        return ~pl.col(col).is_in(values.implode())
+
+    return Rule(f"references({col}, {datasource}.{column})", expr, **kwargs)
+
+
+def sample_rows[F: (pl.DataFrame, pl.LazyFrame)](
+    df: F, sample: int | float, seed: int = 0
+) -> tuple[F, float]:
+    """Gets a (repeatable) random sample of rows.
+
+    Parameters
+    ----------
+    df : pl.DataFrame | pl.LazyFrame
+        The table to sample (a LazyFrame stays lazy).
+    sample : int | float
+        The number (int) or share (float, 0-1) of rows.
+    seed : int
+        Seed for the random sample.
+
+    Returns
+    -------
+    tuple[pl.DataFrame | pl.LazyFrame, float]
+        The sample, and the share of rows sampled.
+    """
+    if isinstance(sample, int):
+        rows = (
+            df.select(pl.len()).collect().item()
+            if isinstance(df, pl.LazyFrame)
+            else df.height
+        )
+        sample = min(sample / max(rows, 1), 1.0)
+    # Keep rows by a hash of their index, so no full shuffle is required
+    buckets = 1_000_000
+    keep = pl.col(_ROW_INDEX).hash(seed) % buckets < int(sample * buckets)
+    return (df.with_row_index(_ROW_INDEX).filter(keep).drop(_ROW_INDEX), sample)
+
+
+def check(
+    df: pl.DataFrame | pl.LazyFrame,
+    rules: list[Rule],
+    sample: int | float | None = None,
+    seed: int = 0,
+) -> Report:
+    """Checks rules against a table in a single pass.
+
+    Parameters
+    ----------
+    df : pl.DataFrame | pl.LazyFrame
+        The table to check.
+    rules : list[Rule]
+        The rules to check (e.g. `not_null`, `in_range`, `unique`, `matches`,
+        `is_in`, `references`).
+    sample : int | float | None
+        Only check a random sample of rows: a number (int) or share (float, 0-1)
+        of rows (default all rows).
+    seed : int
+        Seed for the random sample.
+    """
+    start = time.perf_counter()
+    share = None
+    if sample is not None:
+        df, share = sample_rows(df, sample, seed)
+    exprs = [rule.violations().sum().alias(f"{i}") for i, rule in enumerate(rules)]
+    counts = df.lazy().select(pl.len().alias("rows"), *exprs).collect()
+    results = pl.DataFrame(
+        {
+            "rule": [rule.name for rule in rules],
+            "severity": [rule.severity for rule in rules],
+            "violations": [counts[f"{i}"].item() for i in range(len(rules))],
+            "rows": [counts["rows"].item()] * len(rules),
+        },
+        schema_overrides={"violations": pl.Int64, "rows": pl.Int64},
+    )
+    return Report(results, time.perf_counter() - start, share)
+
+
+def violations[F: (pl.DataFrame, pl.LazyFrame)](df: F, rule: Rule) -> F:
+    """Gets the rows that violate a rule (e.g. to inspect a failed rule)."""
+    return df.filter(rule.violations())
@@ -1,49 +1,123 @@
 """Functions related to dataframe schemas."""
 
-from typing import Literal
+from typing import Callable, Literal
 
 import pandas as pd
 import polars as pl
 from dateutil.parser import parse as parse_date
 
+# Formats tried (in order) when parsing dates from strings (see `enforce`)
+DATE_FORMATS = [
+    "%Y-%m-%d",
+    "%m/%d/%y",
+    "%m/%d/%Y",
+    "%Y%m%d",
+    "%d-%b-%Y",
+    "%b %d, %Y",
+    "%B %d, %Y",
+]
+DATETIME_FORMATS = [
+    "%Y-%m-%d %H:%M:%S%.f",
+    "%Y-%m-%dT%H:%M:%S%.f",
+    "%Y-%m-%d %I:%M:%S%.f %p",
+    "%Y-%m-%d %H:%M",
+    "%m/%d/%Y %H:%M:%S%.f",
+    "%m/%d/%Y %I:%M:%S%.f %p",
+    "%m/%d/%Y %H:%M",
+    "%m/%d/%Y %I:%M %p",
+]
+TIME_FORMATS = [
+    "%H:%M:%S%.f",
+    "%H:%M",
+    "%I:%M:%S%.f %p",
+    "%I:%M %p",
+]
+# Durations such as "02:25:00", "1 day 02:25:00.5", or "1 days, 02:25:00"
+DURATION_PATTERN = (
+    r"^\s*(?:(?<days>\d+)\s*days?,?\s*)?"
+    r"(?<hours>\d+):(?<minutes>\d{2}):(?<seconds>\d{2}(?:\.\d+)?)\s*$"
+)
 
-def enforce(
-    df: pl.DataFrame,
-    schema: tuple[tuple[str, pl.DataType]],
-    sort=True,
-    handle_missing: Literal["add", "ignore", "raise"] = "raise",
-    parse_dates=False,
-) -> pl.DataFrame:
-    """Casts existing columns of a DataFrame to the specified dtypes in a given schema.
-    Ignores columns in the schema that don't exist.
 
-    Parameters
-    ----------
-    df : pl.DataFrame
-        The dataframe to apply dtypes.
-    schema : tuple[tuple[str, pl.DataType]]
-        A tuple of (column_name, datatype) that defines the columns and dtypes for the resulting dataframe.
-        It is assumed that the schema is a complete, or over-complete representation of the dataframe; thus
-          columns in the dataframe not specified by the schema will be dropped.
-    sort : boolean (default True)
-        Whether or not to sort resulting dataframe by column order in schema.
-    handle_missing : Literal["ignore", "add", "raise"]
-        How to handle column-dtypes that are in the schema and not in the dataframe
-            - "add" : Adds a column with the name and dtype (null values)
-            - "ignore" : Does not raise errors when schema columns are not in the dataframe
-            - "raise" : Raises KeyErrors when columns in the schema are not in the dataframe
-    parse_dates : bool (default False)
-        Can be really slow, but a decent fallback when String columns refuse to convert to Date.
+def _parse_residue(s: pl.Series, parse: Callable[[pl.Series], pl.Series]) -> pl.Series:
+    """Parses the strings that a vectorized parser couldn't (the residue).
+
+    `s` is a struct of the strings ("raw") and their vectorized parse ("parsed").
+    """
+    raw = s.struct.field("raw")
+    parsed = s.struct.field("parsed")
+    residue = parsed.is_null() & raw.is_not_null()
+    if not residue.any():
+        return parsed
+    return parsed.scatter(residue.arg_true(), parse(raw.filter(residue)))
+
+
+def _with_fallback(
+    col: str, parsed: pl.Expr, dtype: pl.DataType, parse: Callable
+) -> pl.Expr:
+    """Adds a (slower) fallback parser for strings that `parsed` couldn't parse."""
+    return pl.struct(raw=pl.col(col).replace("", None), parsed=parsed).map_batches(
+        lambda s: _parse_residue(s, parse), return_dtype=dtype
+    )
 
-        Examples
-        --------
-        >>> from bolt.utils import schema
-        >>> df = pl.DataFrame({"a": [1,2,3], "b": ["one", "two", "three"]})
-        >>> to_schema = (("a", pl.String), ("b", pl.String))
-        >>> schema.enforce(df, to_schema)
-        pl.DataFrame({"a": ['1', '2', '3'], "b": ["one", "two", "three"]})
 
+def _parse_temporal(
+    col: str, dtype: pl.DataType, formats: list[str], parse_dates=False
+) -> pl.Expr:
+    """Parses Date, Datetime, or Time strings by trying each format (vectorized).
+
+    With `parse_dates`, the strings that match no format are parsed with dateutil.
     """
+    s = pl.col(col).replace("", None)
+    parsed = pl.coalesce(
+        [s.str.strptime(dtype, fmt, strict=False) for fmt in formats]
+    ).cast(dtype)
+    if not parse_dates:
+        return parsed
+    dtype_name = dtype.base_type().__name__
+
+    def parse(residue: pl.Series) -> pl.Series:
+        values = [parse_date(x) for x in residue]
+        if dtype_name == "Date":
+            values = [x.date() for x in values]
+        elif dtype_name == "Time":
+            values = [x.time() for x in values]
+        return pl.Series(values, dtype=dtype)
+
+    return _with_fallback(col, parsed, dtype, parse)
+
+
+def _parse_duration(col: str, dtype: pl.DataType) -> pl.Expr:
+    """Parses Duration strings, e.g. "HH:MM:SS" (vectorized).
+
+    Other formats (e.g. "2h30m" or negative durations) are parsed with
+    `pandas.to_timedelta`.
+    """
+    parts = pl.col(col).str.extract_groups(DURATION_PATTERN)
+    seconds = (
+        parts.struct.field("days").cast(pl.Int64).fill_null(0) * 86_400
+        + parts.struct.field("hours").cast(pl.Int64) * 3_600
+        + parts.struct.field("minutes").cast(pl.Int64) * 60
+        + parts.struct.field("seconds").cast(pl.Float64)
+    )
+    microseconds = (seconds * 1_000_000).round().cast(pl.Int64)
+    parsed = pl.duration(microseconds=microseconds).cast(dtype)
+
+    def parse(residue: pl.Series) -> pl.Series:
+        # Polars expects 'us', pandas returns 'ns'
+        return pl.Series(pd.to_timedelta(residue.to_pandas())).cast(dtype)
+
+    return _with_fallback(col, parsed, dtype, parse)
+
+
+def _compile(
+    df_schema: pl.Schema,
+    schema: "tuple[tuple[str, pl.DataType]] | Schema",
+    handle_missing: Literal["add", "ignore", "raise"] = "raise",
+    parse_dates=False,
+) -> tuple[list[pl.Expr], list[str]]:
+    """Makes the expressions and column selection that `enforce` applies to a
+    dataframe with the schema `df_schema`."""
     # Expressions to execute in `df.with_columns`
     expressions = []
     # Final cols to keep (sorted)
@@ -56,7 +130,7 @@ def enforce(
             dtype_name: str = dtype.__class__.__name__
 
         # Handle missing columns
-        if col not in df.columns:
+        if col not in df_schema:
             # Ignore
             if handle_missing == "ignore":
                 continue
@@ -70,14 +144,14 @@ def enforce(
                 raise KeyError(f"Dataframe does not have column: '{col}'")
 
         # Drop columns when their dtype is None
-        if col in df.columns and dtype is None:
+        if dtype is None:
             continue
 
         # Add column to final dataframe selection order
         select_columns.append(col)
 
         # Get column dtype
-        orig_dtype: pl.DataType = df.dtypes[df.columns.index(col)]
+        orig_dtype: pl.DataType = df_schema[col]
         # Ignore columns that don't need casting
         if dtype == orig_dtype:
             continue
@@ -96,34 +170,19 @@ def enforce(
 
             # Duration =======================================================
             elif dtype_name.startswith("Duration"):
-                # Durations must be parsed using pandas.to_timedelta, and converted back to pl.Series
-                dur_expr = pl.Series(
-                    # Polars expects 'us', pandas returns 'ns'
-                    pd.to_timedelta(df.to_pandas()[col])
-                ).cast(dtype)
-                expressions.append(dur_expr)
-            # Date ===========================================================
+                expressions.append(_parse_duration(col, dtype).alias(col))
+            # Date, Datetime, Time ===========================================
             elif dtype_name == "Date":
                 if parse_dates:
                     expressions.append(
-                        (
-                            pl.col(col)
-                            .replace("", None)
-                            .map_elements(
-                                lambda x: parse_date(x).date(), return_dtype=pl.Date()
-                            )
-                        )
+                        _parse_temporal(col, dtype, DATE_FORMATS, True).alias(col)
                     )
                 else:
                     expressions.append(pl.col(col).replace("", None).cast(pl.Date()))
             elif dtype_name == "Datetime":
                 if parse_dates:
                     expressions.append(
-                        (
-                            pl.col(col)
-                            .replace("", None)
-                            .map_elements(parse_date, return_dtype=pl.Datetime())
-                        )
+                        _parse_temporal(col, dtype, DATETIME_FORMATS, True).alias(col)
                     )
                 else:
                     expressions.append(
@@ -132,19 +191,67 @@ def enforce(
             elif dtype_name == "Time":
                 if parse_dates:
                     expressions.append(
-                        (
-                            pl.col(col)
-                            .replace("", None)
-                            .map_elements(
-                                lambda x: parse_date(x).time(), return_dtype=pl.Time()
-                            )
-                        )
+                        _parse_temporal(col, dtype, TIME_FORMATS, True).alias(col)
                     )
                 else:
                     expressions.append(pl.col(col).replace("", None).cast(pl.Time()))
             # TODO: elifs for other casting corrections here??
         else:
             expressions.append(pl.col(col).cast(dtype))
+    return (expressions, select_columns)
+
+
+def enforce[F: (pl.DataFrame, pl.LazyFrame)](
+    df: F,
+    schema: "tuple[tuple[str, pl.DataType]] | Schema",
+    sort=True,
+    handle_missing: Literal["add", "ignore", "raise"] = "raise",
+    parse_dates=False,
+) -> F:
+    """Casts existing columns of a DataFrame to the specified dtypes in a given schema.
+    Ignores columns in the schema that don't exist.
+
+    Parameters
+    ----------
+    df : pl.DataFrame | pl.LazyFrame
+        The dataframe to apply dtypes. A LazyFrame stays lazy (only its schema is
+        resolved), so the casts become part of its query plan.
+    schema : tuple[tuple[str, pl.DataType]] | Schema
+        A tuple of (column_name, datatype) that defines the columns and dtypes for the resulting dataframe.
+        Use a `Schema` to compile it once for many dataframes.
+        It is assumed that the schema is a complete, or over-complete representation of the dataframe; thus
+          columns in the dataframe not specified by the schema will be dropped.
+    sort : boolean (default True)
+        Whether or not to sort resulting dataframe by column order in schema.
+    handle_missing : Literal["ignore", "add", "raise"]
+        How to handle column-dtypes that are in the schema and not in the dataframe
+            - "add" : Adds a column with the name and dtype (null values)
+            - "ignore" : Does not raise errors when schema columns are not in the dataframe
+            - "raise" : Raises KeyErrors when columns in the schema are not in the dataframe
+    parse_dates : bool (default False)
+        Parse Date, Datetime, and Time strings by trying each of `DATE_FORMATS`,
+        `DATETIME_FORMATS`, or `TIME_FORMATS` (vectorized); strings that match no
+        format are parsed (slowly) by dateutil.
+
+        Examples
+        --------
+        >>> from bolt.utils import schema
+        >>> df = pl.DataFrame({"a": [1,2,3], "b": ["one", "two", "three"]})
+        >>> to_schema = (("a", pl.String), ("b", pl.String))
+        >>> schema.enforce(df, to_schema)
+        pl.DataFrame({"a": ['1', '2', '3'], "b": ["one", "two", "three"]})
+
+    """
+    # Columns and dtypes of the dataframe (without collecting a LazyFrame)
+    df_schema = df.collect_schema()
+    if isinstance(schema, Schema):
+        expressions, select_columns = schema.compile(
+            df_schema, handle_missing, parse_dates
+        )
+    else:
+        expressions, select_columns = _compile(
+            df_schema, schema, handle_missing, parse_dates
+        )
 
     # Create returned dataframe
     df = df.with_columns(*expressions)
@@ -153,14 +260,14 @@ def enforce(
     return df
 
 
-def apply_sorting(
-    df: pl.DataFrame, schema: tuple[tuple[str, pl.DataType]], drop_nonetypes=True
-) -> pl.DataFrame:
+def apply_sorting[F: (pl.DataFrame, pl.LazyFrame)](
+    df: F, schema: tuple[tuple[str, pl.DataType]], drop_nonetypes=True
+) -> F:
     """Sorts a dataframe using the provided schema.
 
     Parameters
     ----------
-    df : pl.DataFrame
+    df : pl.DataFrame | pl.LazyFrame
         DataFrame to sort columns.
     schema : tuple[tuple[str, pl.DataType]]
         Collection that specifies order of columns for resulting df.
@@ -184,13 +291,16 @@ def apply_sorting(
     return df.select(*[i[0] for i in schema])
 
 
-def validate(
-    df: pl.DataFrame,
+def validate[F: (pl.DataFrame, pl.LazyFrame)](
+    df: F,
     schema: tuple[tuple[str, pl.DataType]],
     sort=True,
     drop_nonetypes=True,
-) -> None:
-    """Asserts that dataframe schema and expected schema are equal."""
+) -> F:
+    """Asserts that dataframe schema and expected schema are equal.
+
+    A LazyFrame is not collected; only its schema is resolved.
+    """
     expected = set(schema)
     # Drop schema items where the dtype is None
     if drop_nonetypes:
@@ -198,7 +308,7 @@ def validate(
     # Drop columns with dtype of None
     if sort:
         df = apply_sorting(df, schema, drop_nonetypes=drop_nonetypes)
-    actual = set(tuple(zip(df.columns, df.dtypes)))
+    actual = set(df.collect_schema().items())
     diff = expected.difference(actual)
     if diff:
         raise pl.exceptions.SchemaError(f"Schemas are not equal: {diff}")
@@ -206,7 +316,7 @@ def validate(
 
 
 def check_names(
-    df: pl.DataFrame,
+    df: pl.DataFrame | pl.LazyFrame,
     schema: tuple[tuple[str, pl.DataType]],
     ignore_missing: list[str] | None = None,
 ) -> None:
@@ -215,8 +325,8 @@ def check_names(
 
     Parameters
     ----------
-    df : pl.DataFrame
-        DataFrame to check columns.
+    df : pl.DataFrame | pl.LazyFrame
+        DataFrame to check columns (a LazyFrame is not collected).
     schema : tuple[tuple[str, pl.DataType]]
         Collection used to create a set of column names to compare with df.
     ignore_missing : list[str]
@@ -243,7 +353,7 @@ def check_names(
         >>> check_names(df, schema)
         SchemaError: `check_names` found columns not expected by schema: {'z'}
     """
-    actual: set[str] = set(df.columns)
+    actual: set[str] = set(df.collect_schema().names())
     expected: set[str] = {i[0] for i in schema}
     # Handle optional ignored schema values
     if ignore_missing:
@@ -263,3 +373,116 @@ def check_names(
             f"`check_names` found columns not expected by schema: {not_expected}"
         )
     return
+
+
+def overrides(
+    schema: tuple[tuple[str, pl.DataType]], include: list[str] | None = None
+) -> pl.Schema:
+    """Makes `schema_overrides` for a scan (e.g. `Datasource.schema_overrides`).
+
+    Reading columns as their final dtypes skips inferring and then casting them,
+    but only works for columns the reader can parse as-is (e.g. no thousands
+    separators, ISO dates); use `include` to limit the columns. Columns with a
+    dtype of None are excluded.
+
+        Examples
+        --------
+        >>> schema = (("id", pl.String), ("count", pl.Int32), ("notes", None))
+        >>> overrides(schema)
+        Schema({'id': String, 'count': Int32})
+        >>> pl.scan_csv("data.csv", schema_overrides=overrides(schema, ["id"]))  # doctest: +SKIP
+    """
+    return pl.Schema(
+        [
+            (col, dtype)
+            for col, dtype in schema
+            if dtype is not None and (include is None or col in include)
+        ]
+    )
+
+
+class Schema:
+    """A schema compiled once and reused (e.g. for every file of an extract).
+
+    Holds the columns as a dict (column: dtype) and caches the expressions made
+    by `enforce` for each input schema, so enforcing many dataframes with the
+    same columns (e.g. source files) only compiles them once. Iterates as
+    (column, dtype) tuples, so it can be used wherever a schema tuple can.
+
+        Examples
+        --------
+        >>> SCHEMA = Schema((("id", pl.String), ("count", pl.Int32), ("notes", None)))
+        >>> SCHEMA.dtypes["count"]
+        Int32
+        >>> lf = pl.scan_csv(path, schema_overrides=SCHEMA.to_polars(["id"]))  # doctest: +SKIP
+        >>> SCHEMA.enforce(lf)  # doctest: +SKIP
+    """
+
+    def __init__(
+        self,
+        columns: "tuple[tuple[str, pl.DataType]] | dict[str, pl.DataType] | Schema",
+    ):
+        if isinstance(columns, dict):
+            columns = columns.items()
+        self.columns: tuple[tuple[str, pl.DataType | None], ...] = tuple(columns)
+        self.dtypes: dict[str, pl.DataType | None] = dict(self.columns)
+        # Compiled `enforce` expressions (by input schema and options)
+        self._compiled: dict[tuple, tuple[list[pl.Expr], list[str]]] = {}
+
+    def __iter__(self):
+        return iter(self.columns)
+
+    def __len__(self) -> int:
+        return len(self.columns)
+
+    def __contains__(self, col: str) -> bool:
+        return col in self.dtypes
+
+    def __eq__(self, other) -> bool:
+        if isinstance(other, Schema):
+            return self.columns == other.columns
+        return NotImplemented
+
+    def __repr__(self) -> str:
+        return f"Schema({self.dtypes})"
+
+    def compile(
+        self,
+        df_schema: pl.Schema,
+        handle_missing: Literal["add", "ignore", "raise"] = "raise",
+        parse_dates=False,
+    ) -> tuple[list[pl.Expr], list[str]]:
+        """Gets the (cached) expressions and column selection used by `enforce`."""
+        key = (tuple(df_schema.items()), handle_missing, parse_dates)
+        if key not in self._compiled:
+            self._compiled[key] = _compile(
+                df_schema, self.columns, handle_missing, parse_dates
+            )
+        return self._compiled[key]
+
+    def enforce[F: (pl.DataFrame, pl.LazyFrame)](
+        self,
+        df: F,
+        sort=True,
+        handle_missing: Literal["add", "ignore", "raise"] = "raise",
+        parse_dates=False,
+    ) -> F:
+        """Casts columns of a dataframe to this schema; see `enforce`."""
+        return enforce(df, self, sort, handle_missing, parse_dates)
+
+    def validate[F: (pl.DataFrame, pl.LazyFrame)](
+        self, df: F, sort=True, drop_nonetypes=True
+    ) -> F:
+        """Asserts that a dataframe has this schema; see `validate`."""
+        return validate(df, self.columns, sort, drop_nonetypes)
+
+    def check_names(
+        self, df: pl.DataFrame | pl.LazyFrame, ignore_missing: list[str] | None = None
+    ) -> None:
+        """Compares a dataframe's column names to this schema; see `check_names`."""
+        return check_names(df, self.columns, ignore_missing)
+
+    def to_polars(self, include: list[str] | None = None) -> pl.Schema:
+        """Converts to a `pl.Schema` (e.g. for `Datasource.schema_overrides`); see
+        `overrides`."""
+        return overrides(self.columns, include)
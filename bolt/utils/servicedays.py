@@ -8,7 +8,9 @@ of any given year and month.
 import calendar
 import collections
 import datetime as dt
-from itertools import cycle
+import functools
+import json
+from hashlib import sha256
 
 import holidays
 import polars as pl
@@ -29,6 +31,15 @@ __changelog__ = """
 - Changed: refactored to use polars rather than pandas
 0.3.1 (2025-02-18)
 - Added CalendarDim class to create `dim_calendar` SQL table
+0.4.0 (2026-10)
+- Changed: CalendarDim is built from a single `pl.date_range` and cached to disk
+  (by years and holiday config)
+- Changed: service day functions use one (memoized) calendar of all dates, and
+  `get_*_many` functions are single joins/group-bys over all year-months
+- Added `get_service_calendar`
+- Changed: `add_service` looks up service types by date (no YMTH column or
+  join required) and accepts LazyFrames
+- Added `service_expr`
 """
 
 # Years ahead
@@ -38,8 +49,12 @@ calendar.setfirstweekday(1)
 
 
 class CalendarDim:
-    def __init__(self):
-        """Create the Calendar dimension (`dim_calendar` table)."""
+    def __init__(self, use_cache=True):
+        """Create the Calendar dimension (`dim_calendar` table).
+
+        The calendar is cached (in 'cache_dir/.calendar') by its years and the
+        holiday config, and is only rebuilt when either changes.
+        """
         self.years = list(range(2020, dt.date.today().year + HORIZON))
         # Additional VIEWs based on dim_calendar
         self.views = [
@@ -49,7 +64,22 @@ class CalendarDim:
             "CREATE OR REPLACE VIEW dimv_month_days AS SELECT YMTH, Service, COUNT(Service) AS Days FROM dim_calendar GROUP BY YMTH, Service ORDER BY YMTH, Service",
             "",  # TODO: replace servicedays functions with VIEWs?
         ]
-
+        self.cache_path = config.cache_dir.joinpath(
+            ".calendar",
+            f"dim_calendar_{self.years[0]}_{self.years[-1]}_{holidays_key()}.arrow",
+        )
+        if use_cache and self.cache_path.exists():
+            self.data = pl.read_ipc(self.cache_path)
+            return
+        self.data = self.build()
+        # Write to a temporary file and swap, so the cache is never partially written
+        self.cache_path.parent.mkdir(parents=True, exist_ok=True)
+        tmp_path = self.cache_path.with_suffix(".tmp")
+        self.data.write_ipc(tmp_path)
+        tmp_path.replace(self.cache_path)
+
+    def build(self) -> pl.DataFrame:
+        """Builds the calendar (one row per date of `years`)."""
         # Dataframe of holiday dates and service
         holiday_dates = (
             # Get all holiday dates
@@ -76,29 +106,19 @@ class CalendarDim:
         )
 
         # Dataframe of full calendar
-        cal = calendar.Calendar()
-        zips = []
-        for year in self.years:
-            for m in range(1, 13):
-                cal_zip = zip(cal.itermonthdays(year, m), cycle(calendar.day_name))
-                zips.append(
-                    # Get full calendar
-                    pl.DataFrame(
-                        [
-                            (dt.date(year, m, day), day_name)
-                            for day, day_name in cal_zip
-                            if day > 0
-                        ],
-                        schema=["Date", "DayName"],
-                        orient="row",
-                    )
-                    # Join with holidays
-                    .join(holiday_dates, on="Date", how="left")
-                )
+        dates = pl.date_range(
+            dt.date(self.years[0], 1, 1),
+            dt.date(self.years[-1], 12, 31),
+            interval="1d",
+            eager=True,
+        )
 
         # Full dataframe of full calendar, holidays, and other date-dimensional info
         df = (
-            pl.concat(zips, how="vertical")
+            pl.DataFrame({"Date": dates})
+            .with_columns(pl.col("Date").dt.strftime("%A").alias("DayName"))
+            # Join with holidays
+            .join(holiday_dates, on="Date", how="left")
             .with_columns(
                 # Get service type for holidays (convert "Normal" appropriately)
                 pl.when((pl.col("Service").is_null()) | (pl.col("Service") == "Normal"))
@@ -112,7 +132,7 @@ class CalendarDim:
                 # Get Year
                 pl.col("Date").dt.year().alias("Year"),
                 # Get Year-Month (YMTH)
-                pl.col("Date").dt.strftime("%Y%m").cast(pl.Int64).alias("YMTH"),
+                YearMonth.from_date_expr("Date").alias("YMTH"),
                 # Get Fiscal Year
                 (
                     pl.when(pl.col("Date").dt.month() >= 7)
@@ -128,9 +148,7 @@ class CalendarDim:
                 (
                     pl.col("Date")
                     .dt.quarter()
-                    .map_elements(
-                        lambda x: {1: 3, 2: 4, 3: 1, 4: 2}[x], return_dtype=pl.Int8
-                    )
+                    .replace_strict({1: 3, 2: 4, 3: 1, 4: 2}, return_dtype=pl.Int8)
                     .alias("FQ")
                 ),
             )
@@ -146,6 +164,7 @@ class CalendarDim:
                 "Holiday",
                 "Service",
             )
+            .sort("Date")
         )
 
         # Validate agency holidays
@@ -154,11 +173,34 @@ class CalendarDim:
                 continue
             assert df.filter(pl.col("Holiday") == k)["Service"].unique().item() == v
 
-        self.data = df
+        return df
 
 
-def get_holiday_service(year: int, drop_observed=False) -> pl.DataFrame:
-    """Returns a DataFrame of holidays and the service provided by MUTD."""
+def holidays_key() -> str:
+    """Gets a hash of the holiday config (and `holidays` version) for caching."""
+    key = json.dumps([holidays.__version__, sorted(config.holidays.items())])
+    return sha256(key.encode("UTF8")).hexdigest()[:12]
+
+
+def _year_range(*years: int) -> tuple[int, int]:
+    """Gets the first and last year of the calendar to use for `years`.
+
+    Covers at least the years of `CalendarDim`, so that one (cached) calendar
+    serves most lookups.
+    """
+    first = min([*years, 2020])
+    last = max([*years, dt.date.today().year + HORIZON - 1])
+    return (first, last)
+
+
+@functools.lru_cache(maxsize=16)
+def _holiday_service(
+    first_year: int, last_year: int, key: str, drop_observed=False
+) -> pl.DataFrame:
+    """Holidays and the service provided (see `get_holiday_service`).
+
+    Cached by years and holiday config (`key`; see `holidays_key`).
+    """
     # Convert holiday config to DataFrame
     service = pl.DataFrame(
         [(k, v) for k, v in config.holidays.items()],
@@ -168,32 +210,21 @@ def get_holiday_service(year: int, drop_observed=False) -> pl.DataFrame:
 
     # Get holiday dates
     holiday_dates = pl.DataFrame(
-        [(k, v) for k, v in holidays.US(years=[year]).items()],
-        schema=["Date", "Holiday"],
-        orient="row",
-    )
-
-    # Cast to datetime and create day column
-    holiday_dates = holiday_dates.with_columns(
         [
-            pl.col("Date").cast(pl.Datetime),
-            pl.col("Holiday").cast(pl.Utf8),
-            pl.col("Date").dt.strftime("%A").alias("Day"),
-        ]
-    )
+            (k, v)
+            for k, v in holidays.US(years=range(first_year, last_year + 1)).items()
+        ],
+        schema={"Date": pl.Date, "Holiday": pl.Utf8},
+        orient="row",
+    ).with_columns(pl.col("Date").dt.strftime("%A").alias("Day"))
 
-    # Join with service type and sort
-    holiday_df = holiday_dates.join(service, on="Holiday", how="left").sort(
-        "Date", descending=True
-    )
+    # Join with service type
+    holiday_df = holiday_dates.join(service, on="Holiday", how="left")
 
     # Drop observed holidays if requested
     if drop_observed:
         holiday_df = holiday_df.filter(~pl.col("Holiday").str.contains("observed"))
 
-    # Sort by date
-    holiday_df = holiday_df.sort("Date").with_row_index().drop("index")
-
     # Fill null values with "Normal" service and convert to appropriate service type
     holiday_df = holiday_df.with_columns(
         pl.when(pl.col("Service").is_null())
@@ -204,27 +235,66 @@ def get_holiday_service(year: int, drop_observed=False) -> pl.DataFrame:
         )
         .otherwise(pl.col("Service"))
         .alias("Service"),
-        # Set date to date (not datetime)
-        pl.col("Date").dt.date(),
+    ).sort("Date")
+    return holiday_df
+
+
+@functools.lru_cache(maxsize=16)
+def _service_calendar(
+    first_year: int, last_year: int, key: str, drop_observed=False
+) -> pl.DataFrame:
+    """All dates of the years with the service type and holiday names (and YMTH).
+
+    Cached by years and holiday config (`key`; see `holidays_key`), so that
+    lookups for many year-months are joins/filters of a single table.
+    """
+    dates = pl.date_range(
+        dt.date(first_year, 1, 1), dt.date(last_year, 12, 31), "1d", eager=True
+    )
+    holiday_df = _holiday_service(first_year, last_year, key, drop_observed)
+    df = (
+        pl.DataFrame({"Date": dates})
+        .with_columns(
+            pl.col("Date").dt.strftime("%A").alias("DayName"),
+            YearMonth.from_date_expr("Date").alias("YMTH"),
+        )
+        .join(holiday_df.drop("Day"), on="Date", how="left")
+        # Set normal Weekday and weekend service
+        .with_columns(
+            pl.when(pl.col("Service").is_not_null())
+            .then(pl.col("Service"))
+            .when(pl.col("DayName").is_in(["Saturday", "Sunday"]))
+            .then(pl.col("DayName"))
+            .otherwise(pl.lit("Weekday"))
+            .alias("Service")
+        )
+        .select("Date", "YMTH", "DayName", "Service", "Holiday")
+        .sort("Date")
     )
+    return df
 
-    return holiday_df
+
+def get_service_calendar(*yearmonths: int, drop_observed=False) -> pl.DataFrame:
+    """Returns the (cached) calendar for all dates of the year-months' years."""
+    years = [ymth // 100 for ymth in yearmonths] or [dt.date.today().year]
+    return _service_calendar(*_year_range(*years), holidays_key(), drop_observed)
+
+
+def get_holiday_service(year: int, drop_observed=False) -> pl.DataFrame:
+    """Returns a DataFrame of holidays and the service provided by MUTD."""
+    holiday_df = _holiday_service(*_year_range(year), holidays_key(), drop_observed)
+    return holiday_df.filter(pl.col("Date").dt.year() == year).select(
+        "Date", "Holiday", "Day", "Service"
+    )
 
 
 def get_month_days(year: int, month: int) -> pl.DataFrame:
     """Return a DataFrame of dates and day names for a month."""
-    cal = calendar.Calendar()
-    cal_zip = zip(cal.itermonthdays(year, month), cycle(calendar.day_name))
+    start = dt.date(year, month, 1)
+    end = dt.date(year, month, calendar.monthrange(year, month)[1])
     df = pl.DataFrame(
-        [
-            (dt.datetime(year, month, day), day_name)
-            for day, day_name in cal_zip
-            if day > 0
-        ],
-        schema=["Date", "DayName"],
-        orient="row",
-    )
-    df = df.with_columns(pl.col("Date").dt.date())
+        {"Date": pl.date_range(start, end, "1d", eager=True)}
+    ).with_columns(pl.col("Date").dt.strftime("%A").alias("DayName"))
     return df
 
 
@@ -239,99 +309,98 @@ def get_weekday_count(year: int, month: int) -> dict[str, int]:
 
 def get_full_calendar(year: int, month: int, drop_observed=False) -> pl.DataFrame:
     """Returns a DataFrame of all dates in a month, the service type, and holiday names."""
-    month_days: pl.DataFrame = get_month_days(year, month)
-    holiday_df: pl.DataFrame = get_holiday_service(year, drop_observed=drop_observed)
-    df: pl.DataFrame = month_days.join(holiday_df, on="Date", how="left")
-    # Set normal Weekday service
-    df = df.with_columns(
-        pl.when(
-            pl.col("Service").is_null()
-            & ~pl.col("DayName").is_in(["Saturday", "Sunday"])
-        )
-        .then(pl.lit("Weekday"))
-        .otherwise(pl.col("Service"))
-        .alias("Service")
-    )
-    # Get normal weekend service
-    df = df.with_columns(
-        pl.when(
-            pl.col("Service").is_null()
-            & pl.col("DayName").is_in(["Saturday", "Sunday"])
-        )
-        .then(pl.col("DayName"))
-        .otherwise(pl.col("Service"))
-        .alias("Service")  # ServiceType
-    )
-    df = df.select("Date", "DayName", "Service", "Holiday").sort("Date")
-    return df
+    return get_full_calendar_many(int(f"{year}{month:02}"), drop_observed=drop_observed)
 
 
-def get_full_calendar_many(*yearmonths: int):
-    dfs = []
-    for ymth in set(yearmonths):
-        dfs.append(get_full_calendar(*YearMonth(ymth).to_year_and_month()))
+def get_full_calendar_many(*yearmonths: int, drop_observed=False) -> pl.DataFrame:
+    """Returns a DataFrame of all dates in many months, the service type, and
+    holiday names."""
+    yearmonths = [int(i) for i in set(yearmonths)]
     df = (
-        pl.concat(dfs, how="vertical_relaxed")
-        .with_columns(pl.col("Date").dt.date())
-        .sort("Date")
+        get_service_calendar(*yearmonths, drop_observed=drop_observed)
+        .filter(pl.col("YMTH").is_in(yearmonths))
+        .select("Date", "DayName", "Service", "Holiday")
     )
     return df
 
 
 def get_service_days(year: int, month: int) -> pl.DataFrame:
     """Counts the number of days by service type."""
-    full_cal_df: pl.DataFrame = get_full_calendar(
-        year,
-        month,
-        drop_observed=True,  # Static True value
+    return get_service_days_many(int(f"{year}{month:02}"))
+
+
+def get_service_days_many(*yearmonths: int) -> pl.DataFrame:
+    """Counts the number of days by service type for multiple year-months.
+
+    Includes a "Closed" row (0 days) for year-months without closures, and a
+    "Total" row for each year-month.
+    """
+    yearmonths = sorted({int(i) for i in yearmonths})
+    cal_df = get_service_calendar(*yearmonths, drop_observed=True).filter(
+        pl.col("YMTH").is_in(yearmonths)
     )
     # Group the full calendar dataframe by ServiceType and count the days for each type
-    df: pl.DataFrame = full_cal_df.group_by("Service").agg(  # ServiceType
-        pl.col("DayName").count(), pl.col("Holiday").count()
+    counts = (
+        cal_df.group_by("YMTH", "Service")
+        .agg(
+            pl.col("DayName").count().cast(pl.Int64).alias("DayCount"),
+            pl.col("Holiday").count().cast(pl.Int64).alias("HolidayCount"),
+        )
+        .sort("YMTH", "Service")
     )
     # Add closed count (0) for year-months that don't have them
-    if (
-        df.filter((pl.col("Service") == "Closed")).select("Service").is_empty()
-    ):  # ServiceType  # ServiceType
-        df = pl.concat(
-            [
-                df,
-                pl.DataFrame(
-                    {"Service": "Closed", "DayName": 0, "Holiday": 0}
-                ),  # ServiceType
-            ],
-            how="vertical_relaxed",
+    closed = (
+        pl.DataFrame({"YMTH": yearmonths}, schema={"YMTH": pl.Int64})
+        .join(counts.filter(pl.col("Service") == "Closed"), on="YMTH", how="anti")
+        .select(
+            "YMTH",
+            pl.lit("Closed").alias("Service"),
+            pl.lit(0, pl.Int64).alias("DayCount"),
+            pl.lit(0, pl.Int64).alias("HolidayCount"),
         )
-    # Add Total row
-    df = pl.concat([df, df.sum().fill_null("Total")])
-    # Display the target time period (yearmonth)
-    df = df.with_columns(
-        pl.lit(str(year) + str(month).zfill(2), dtype=pl.String)
-        .cast(pl.Int64)
-        .alias("YMTH"),
-        pl.col("DayName").alias("DayCount"),
-        pl.col("Holiday").alias("HolidayCount"),
-    ).select("YMTH", "Service", "DayCount", "HolidayCount")  # ServiceType
+    )
+    # Add Total rows
+    totals = counts.group_by("YMTH").agg(
+        pl.lit("Total").alias("Service"),
+        pl.col("DayCount").sum(),
+        pl.col("HolidayCount").sum(),
+    )
+    df = pl.concat([counts, closed, totals], how="vertical_relaxed").sort(
+        "YMTH", maintain_order=True
+    )
     return df
 
 
-def get_service_days_many(*yearmonths: int) -> pl.DataFrame:
-    """Counts the number of days by service type for multiple year-months."""
-    dfs = []
-    for i in set(yearmonths):
-        year = int(str(i)[:4])
-        month = int(str(i)[4:])
-        dfs.append(get_service_days(year, month))
-    df = pl.concat(dfs, how="vertical_relaxed").sort("YMTH")
-    return df
+def service_expr(date_col: str = "Date", *years: int) -> pl.Expr:
+    """Makes an expression for the service type of a date column.
 
+    The service type is looked up in the (cached) calendar by its offset in days
+    from the first date of the calendar, so no join is required. The calendar
+    covers `years` (and at least the years of `CalendarDim`); service types of
+    other dates are null.
+    """
+    first, last = _year_range(*years)
+    services = _service_calendar(first, last, holidays_key())["Service"]
+    offset = (
+        pl.col(date_col).cast(pl.Date) - pl.lit(dt.date(first, 1, 1))
+    ).dt.total_days()
+    valid = offset.is_between(0, services.len() - 1)
+    return pl.lit(services).gather(pl.when(valid).then(offset)).alias("Service")
 
-def add_service(df: pl.DataFrame, ymth_col: str = "YMTH"):
-    """Adds a 'Service' column to a dataframe using a date column."""
-    cal_df: pl.DataFrame = get_full_calendar_many(*set(df[ymth_col])).select(
-        "Date", "Service"
-    )
-    return df.join(cal_df, on=["Date"])
+
+def add_service[F: (pl.DataFrame, pl.LazyFrame)](
+    df: F, ymth_col: str | None = None, date_col: str = "Date"
+) -> F:
+    """Adds a 'Service' column to a dataframe using a date column.
+
+    `ymth_col` is no longer required (kept for compatibility). For a LazyFrame,
+    dates outside the years of `CalendarDim` get a null service type.
+    """
+    years = []
+    if isinstance(df, pl.DataFrame) and df.height:
+        dates = df[date_col].cast(pl.Date)
+        years = [d.year for d in (dates.min(), dates.max()) if d is not None]
+    return df.with_columns(service_expr(date_col, *years))
 
 
 def add_service_days(
@@ -339,7 +408,9 @@ def add_service_days(
 ):
     """Adds a new 'Service Days' column to a DataFrame given a Year-Month
     column and 'Service' column."""
-    service_df: pl.DataFrame = get_service_days_many(*set(df[ymth_col])).select(
-        "YMTH", "Service", "DayCount"
+    service_df: pl.DataFrame = (
+        get_service_days_many(*set(df[ymth_col]))
+        .select("YMTH", "Service", "DayCount")
+        .rename({"YMTH": ymth_col, "Service": service_col})
     )
     return df.join(service_df, on=[ymth_col, service_col])
@@ -1,22 +1,73 @@
 """Functions for the DuckDB Warehouse."""
 
+import threading
+from concurrent.futures import FIRST_COMPLETED, Future, ThreadPoolExecutor, wait
+from dataclasses import dataclass
+from graphlib import TopologicalSorter
 from hashlib import sha256
 from pathlib import Path
+from typing import Callable, Iterable
 
 import duckdb
+import pandas as pd
 import polars as pl
 import xlsxwriter
+from pyarrow.dataset import dataset as arrow_dataset
+from pyarrow.fs import LocalFileSystem
 
 from bolt.datasources import Datasource
-from bolt.utils import config, funcs
+from bolt.pipeline import UpdateResult
+from bolt.utils import config, get_sql_dependency_graph, hash_file
 from bolt.utils.servicedays import CalendarDim  # TODO: watch for changes here
 
 DB_PATH = config.data_dir.joinpath(config.db_name)
 
-SQL_FUNCS = [
-    funcs.fiscal_year,
+# Only compact the database if at least this share of it is free (wasted) space
+COMPACT_THRESHOLD: float = getattr(config, "compact_threshold", 0.25)
+
+
+@dataclass(frozen=True)
+class SQLMacro:
+    """A scalar SQL macro; runs natively (vectorized) in DuckDB."""
+
+    name: str
+    parameters: tuple[str, ...]
+    expression: str
+
+
+@dataclass(frozen=True)
+class SQLFunction:
+    """A Python function that DuckDB calls once per batch (with `pyarrow` arrays)."""
+
+    name: str
+    function: Callable
+    parameters: tuple[str, ...]  # DuckDB types (e.g. "INTEGER")
+    return_type: str
+
+
+# Functions available in SQL (see `register_sql_function` and `load_funcs`)
+SQL_FUNCS: list[SQLMacro | SQLFunction] = [
+    # Same as `funcs.fiscal_year` (e.g. 202407 -> 'FY25')
+    SQLMacro(
+        "fiscal_year",
+        ("year_month",),
+        "'FY' || lpad(((CAST(year_month AS INTEGER) // 100"
+        " + (CAST(year_month AS INTEGER) % 100 >= 7)::INTEGER) % 100)::VARCHAR, 2, '0')",
+    ),
 ]
 
+
+def register_sql_function(func: SQLMacro | SQLFunction) -> SQLMacro | SQLFunction:
+    """Adds a function to those loaded into DuckDB (replacing any with the same name).
+
+    Prefer an `SQLMacro` where possible; use an `SQLFunction` (vectorized with
+    `pyarrow.compute`) otherwise. Avoid row-by-row Python functions.
+    """
+    SQL_FUNCS[:] = [f for f in SQL_FUNCS if f.name != func.name]
+    SQL_FUNCS.append(func)
+    return func
+
+
 SQL_FILES: list[Path] = [
     config.definitions_dir.joinpath("sql").joinpath(sql_file)
     for sql_file in config.dependencies["sql"]
@@ -24,15 +75,32 @@ SQL_FILES: list[Path] = [
 
 
 def load_funcs(con: duckdb.DuckDBPyConnection) -> None:
-    """Loads Python functions into DuckDB."""
+    """Loads SQL macros and (vectorized) Python functions into DuckDB.
+
+    Macros are stored in the database, so views that use them also work in
+    other clients. Python functions are shared by all cursors of a connection.
+    """
     for fn in SQL_FUNCS:
+        if isinstance(fn, SQLMacro):
+            params = ", ".join(fn.parameters)
+            con.execute(
+                f"CREATE OR REPLACE MACRO {fn.name}({params}) AS {fn.expression};"
+            )
+            continue
         try:
-            con.remove_function(fn.__name__)
+            con.remove_function(fn.name)
         except duckdb.InvalidInputException:
             pass
         try:
-            con.create_function(fn.__name__, fn)
+            con.create_function(
+                fn.name,
+                fn.function,
+                [duckdb.sqltype(t) for t in fn.parameters],
+                duckdb.sqltype(fn.return_type),
+                type="arrow",
+            )
         except duckdb.CatalogException:
+            # Already loaded by another cursor of the same database
             pass
     return
 
@@ -48,89 +116,493 @@ def connect() -> duckdb.DuckDBPyConnection:
     return con
 
 
-def compact() -> tuple[str]:
-    """Makes a compacted copy of the DuckDB Data Warehouse.
+class Warehouse:
+    """A session with the DuckDB data warehouse.
+
+    The database is opened (and extensions and functions are loaded) once, and
+    each thread gets its own cursor of the shared connection. Use as a context
+    manager, or call `close` when done.
+
+    Example
+    -------
+    ```
+    with Warehouse() as wh:
+        wh.sql("SELECT * FROM data_updates")
+        load_datasource(wh.cursor(), result)
+    ```
+    """
+
+    def __init__(self):
+        self.con = connect()
+        self._local = threading.local()
+        self._cursors: list[duckdb.DuckDBPyConnection] = []
+        self._lock = threading.Lock()
+
+    def cursor(self) -> duckdb.DuckDBPyConnection:
+        """Gets the cursor of the current thread (cursors are not thread-safe)."""
+        cur = getattr(self._local, "cursor", None)
+        if cur is None:
+            cur = self.con.cursor()
+            cur.execute("PRAGMA disable_progress_bar;")
+            self._local.cursor = cur
+            with self._lock:
+                self._cursors.append(cur)
+        return cur
+
+    def sql(self, query: str, **kwargs):
+        """Runs a query with the cursor of the current thread."""
+        return self.cursor().sql(query, **kwargs)
+
+    def execute(self, query: str, parameters=None):
+        """Executes a statement with the cursor of the current thread."""
+        return self.cursor().execute(query, parameters)
+
+    def close(self) -> None:
+        """Closes all cursors and the connection (safe to call more than once)."""
+        with self._lock:
+            for cur in self._cursors:
+                cur.close()
+            self._cursors.clear()
+        self._local = threading.local()
+        self.con.close()
+        return
+
+    def __enter__(self) -> "Warehouse":
+        return self
+
+    def __exit__(self, *args) -> None:
+        self.close()
+
+
+def free_space() -> tuple[int, int]:
+    """Gets the free (wasted) and total size of the data warehouse, in bytes.
+
+    The database is checkpointed first, so the sizes include the write-ahead log.
+    """
+    with duckdb.connect(DB_PATH) as con:
+        con.execute("CHECKPOINT;")
+        block_size, total_blocks, free_blocks = con.sql(
+            "SELECT block_size, total_blocks, free_blocks FROM pragma_database_size();"
+        ).fetchone()
+    return (free_blocks * block_size, total_blocks * block_size)
+
+
+def compact(
+    threshold: float = COMPACT_THRESHOLD,
+    progress: Callable[[str, int, int], None] | None = None,
+) -> str:
+    """Makes a compacted copy of the DuckDB Data Warehouse (if worthwhile).
 
     Helps resolve file size increase issue found here:
     https://github.com/duckdb/duckdb/issues/9429
     From best practices found here:
     https://duckdb.org/docs/operations_manual/footprint_of_duckdb/reclaiming_space.html
+
+    Only compacts if the share of free (wasted) space is at least `threshold`.
+    The schema is copied to a new file, then each table is copied (calling
+    `progress(table, i, n)` before each). The new file then replaces the
+    original in a single (atomic) rename, so the original is never lost.
     """
-    name = str(DB_PATH.name)
+    free, total = free_space()
+    if total == 0 or free / total < threshold:
+        return f"[white]Not compacted ({free / max(total, 1):.0%} free space)[/]"
     old_size = DB_PATH.stat().st_size / 1024
-    new_db = Path(str(DB_PATH).replace(DB_PATH.name, "_compacting.duckdb"))
-    duckdb.sql(f"ATTACH '{DB_PATH}' AS db1;")
-    duckdb.sql(f"ATTACH '{new_db}' AS db2;")
-    duckdb.sql("COPY FROM DATABASE db1 TO db2;")
-    duckdb.close()
-    DB_PATH.unlink()
-    new_db.rename(new_db.parent.joinpath(name))
+    new_db = DB_PATH.with_name(f"_compacting_{DB_PATH.name}")
+    # Remove any copy left by an interrupted compaction
+    new_db.unlink(missing_ok=True)
+    new_db.with_name(f"{new_db.name}.wal").unlink(missing_ok=True)
+    with duckdb.connect() as con:
+        # Spatial is required to copy GEOMETRY columns
+        con.execute("install spatial; load spatial;")
+        con.execute(f"ATTACH '{DB_PATH}' AS db1 (READ_ONLY);")
+        con.execute(f"ATTACH '{new_db}' AS db2;")
+        con.execute("COPY FROM DATABASE db1 TO db2 (SCHEMA);")
+        tables = con.sql(
+            "SELECT table_schema, table_name FROM information_schema.tables "
+            "WHERE table_catalog = 'db1' AND table_type = 'BASE TABLE';"
+        ).fetchall()
+        for i, (schema, table) in enumerate(tables):
+            if progress:
+                progress(table, i + 1, len(tables))
+            con.execute(
+                f'INSERT INTO db2."{schema}"."{table}" '
+                f'SELECT * FROM db1."{schema}"."{table}";'
+            )
+        con.execute("CHECKPOINT db2;")
+        con.execute("DETACH db2;")
+        con.execute("DETACH db1;")
+    new_db.replace(DB_PATH)
     new_size = DB_PATH.stat().st_size / 1024
     return f"[white]Compacted ({old_size:,.0f} KB to {new_size:,.0f} KB[/])"
 
 
-def create_schemas():
-    """Creates a table of all datasource schemas (polars)."""
-    db = connect()
+def create_schemas(wh: Warehouse | None = None, excel=True):
+    """Creates a table of all datasource schemas ('datasource_schemas').
+
+    Schemas are read from `information_schema` (no data is scanned). With
+    `excel`, the schemas are also written to 'schemas.xlsx' (one worksheet per
+    table), but only if they changed since it was written (see 'table_updates')
+    or the file doesn't exist.
+    Uses the warehouse session `wh` if given (otherwise a new connection).
+    """
+    db = wh.cursor() if wh else connect()
+    query = "SELECT * FROM datasource_schemas ORDER BY ALL"
+    previous = None
+    if _table_exists(db, "datasource_schemas"):
+        previous = db.sql(query).fetchall()
     db.sql(
-        "CREATE OR REPLACE TABLE datasource_schemas (datasource VARCHAR, columns VARCHAR, dtype VARCHAR);"
+        """
+        CREATE OR REPLACE TABLE datasource_schemas AS
+        SELECT
+            c.table_name::VARCHAR AS datasource,
+            c.column_name::VARCHAR AS columns,
+            c.data_type::VARCHAR AS dtype
+        FROM information_schema.columns AS c
+        JOIN view_all_tables AS t ON c.table_name = t.name
+        WHERE c.table_schema = 'main'
+        ORDER BY c.table_name, c.ordinal_position;
+        """
     )
-    tbls: list[str] = db.sql("SELECT * FROM view_all_tables").pl()["name"].to_list()
-    with xlsxwriter.Workbook(config.data_dir.joinpath("schemas.xlsx")) as wb:
-        for tbl in tbls:
-            # Using polars -> pandas here prevent duration type errors
-            df = pl.DataFrame(db.sql(f"SELECT * FROM {tbl}").df())
-            data = pl.DataFrame(
-                {
-                    "datasource": [
-                        tbl,
-                    ]
-                    * len(df.columns),
-                    "columns": df.columns,
-                    "dtype": df.dtypes,
-                }
-            )
-            data.write_excel(wb, worksheet=tbl)
-            # Using polars -> pandas here prevents panic errors (some rust bug)
-            data = data.to_pandas()
-            db.sql(
-                "INSERT INTO datasource_schemas SELECT * FROM data"
-            )  # raises panic error if polars.DataFrame
-    db.close()
+    if previous != db.sql(query).fetchall():
+        _mark_table_updated(db, "datasource_schemas")
+    (updated,) = db.execute(
+        "SELECT epoch_us(updated_at) FROM table_updates WHERE name = 'datasource_schemas'"
+    ).fetchone() or (None,)
+    xlsx_path = config.data_dir.joinpath("schemas.xlsx")
+    if excel and (
+        not xlsx_path.exists()
+        or (updated is not None and xlsx_path.stat().st_mtime_ns // 1000 < updated)
+    ):
+        schemas = db.sql("SELECT * FROM datasource_schemas").pl()
+        with xlsxwriter.Workbook(xlsx_path) as wb:
+            for (tbl,), data in schemas.partition_by(
+                "datasource", as_dict=True, maintain_order=True
+            ).items():
+                data.write_excel(wb, worksheet=tbl)
+    if wh is None:
+        db.close()
+    return
+
+
+def _table_exists(con: duckdb.DuckDBPyConnection, name: str) -> bool:
+    """Whether a table exists in the database."""
+    return bool(
+        con.execute(
+            "SELECT 1 FROM information_schema.tables WHERE table_name = ?", [name]
+        ).fetchone()
+    )
+
+
+def _create_update_tables(con: duckdb.DuckDBPyConnection) -> None:
+    """Creates the tables that record when tables were loaded and SQL files run.
+
+    'table_updates' records when each table (e.g. a datasource) was (last)
+    loaded and, if known, a hash of its data; 'sql_updates' records when each
+    SQL file was (last) run. See `_stale_sql_files`.
+    """
+    con.execute(
+        "CREATE TABLE IF NOT EXISTS table_updates (name VARCHAR PRIMARY KEY, updated_at TIMESTAMPTZ, hash VARCHAR);"
+    )
+    con.execute(
+        "CREATE TABLE IF NOT EXISTS sql_updates (sql_file VARCHAR PRIMARY KEY, last_updated DATE, hash VARCHAR);"
+    )
+    # Added to databases made by earlier versions
+    con.execute(
+        "ALTER TABLE sql_updates ADD COLUMN IF NOT EXISTS updated_at TIMESTAMPTZ;"
+    )
+    con.execute("ALTER TABLE table_updates ADD COLUMN IF NOT EXISTS hash VARCHAR;")
+    return
+
+
+def _mark_table_updated(
+    con: duckdb.DuckDBPyConnection, name: str, hash_: str | None = None
+) -> None:
+    """Records that a table was (or is about to be) loaded; see `_stale_sql_files`."""
+    _create_update_tables(con)
+    con.execute(
+        "INSERT OR REPLACE INTO table_updates VALUES (?, now(), ?);",
+        [name.lower(), hash_],
+    )
+    return
+
+
+def _update_calendar(con: duckdb.DuckDBPyConnection) -> bool:
+    """Re-creates the `dim_calendar` table if the calendar changed.
+
+    The calendar changes with its years and the holiday config (see
+    `CalendarDim`); the table is marked as updated so that SQL files that
+    require it are re-run.
+
+    Returns
+    -------
+    bool
+        Whether the table was re-created.
+    """
+    calendar = CalendarDim()
+    key = calendar.cache_path.stem
+    _create_update_tables(con)
+    last = con.execute(
+        "SELECT hash FROM table_updates WHERE name = 'dim_calendar'"
+    ).fetchone()
+    if _table_exists(con, "dim_calendar") and last is not None and last[0] == key:
+        return False
+    _mark_table_updated(con, "dim_calendar", key)
+    calendar_dim = calendar.data  # noqa: F841
+    con.sql("CREATE OR REPLACE TABLE dim_calendar AS SELECT * FROM calendar_dim;")
+    return True
+
+
+def _register_cache(con: duckdb.DuckDBPyConnection, name: str, path: Path) -> str:
+    """Gets a relation (SQL) that reads a datasource cache without copying it.
+
+    Parquet caches (and directories of partitioned Parquet files) are read
+    directly by DuckDB. Arrow caches are memory-mapped and registered as a
+    `pyarrow` dataset, which DuckDB scans in batches (zero-copy).
+    """
+    if path.is_dir():
+        # The partition column is kept in each file
+        return (
+            f"read_parquet('{path.as_posix()}/*/*.parquet', hive_partitioning = false)"
+        )
+    if path.suffix == ".parquet":
+        return f"read_parquet('{path.as_posix()}')"
+    source = f"{name}__source"
+    fs = LocalFileSystem(use_mmap=True)
+    con.register(source, arrow_dataset(str(path), format="ipc", filesystem=fs))
+    return source
+
+
+def replace_table(con: duckdb.DuckDBPyConnection, name: str, relation: str) -> None:
+    """Loads a relation into a staging table, then swaps it in (atomically).
+
+    If the load fails, the existing table is left as it was.
+    """
+    staging = f"{name}__staging"
+    try:
+        con.execute(f"CREATE OR REPLACE TABLE {staging} AS SELECT * FROM {relation};")
+        con.execute("BEGIN TRANSACTION;")
+        try:
+            con.execute(f"DROP TABLE IF EXISTS {name};")
+            con.execute(f"ALTER TABLE {staging} RENAME TO {name};")
+            con.execute("COMMIT;")
+        except Exception:
+            con.execute("ROLLBACK;")
+            raise
+    finally:
+        con.execute(f"DROP TABLE IF EXISTS {staging};")
     return
 
 
+def load_datasource(con: duckdb.DuckDBPyConnection, result: UpdateResult) -> bool:
+    """Loads the processed data of an updated datasource into the warehouse.
+
+    In-memory data is registered as an Arrow table (zero-copy); otherwise the
+    cache is read directly (see `_register_cache`). Tables are replaced using
+    a staging table (see `replace_table`), and incremental updates only insert
+    the new parts into the existing table (unless the table doesn't match the
+    cache, e.g. after a failed load, in which case it is replaced).
+
+    Returns
+    -------
+    bool
+        Whether a table was loaded.
+    """
+    name = result.name
+    source = f"{name}__source"
+    parts_source = f"{name}__parts"
+    if result.kind is None:
+        return False
+    # Marked before loading, so that SQL files that require the table are re-run
+    #  even if this load (or the process) fails part way
+    _mark_table_updated(con, name)
+    try:
+        if result.kind == "spatial":
+            relation = f"st_read('{result.cache_path}')"
+            replace_table(con, name, relation)
+            return True
+        if result.kind == "append" and _table_exists(con, name):
+            # Incremental update: insert only the new rows into the existing table
+            cache = _register_cache(con, name, result.cache_path)
+            con.execute("BEGIN TRANSACTION;")
+            try:
+                if result.parts:
+                    fs = LocalFileSystem(use_mmap=True)
+                    parts = [str(p) for p in result.parts]
+                    con.register(
+                        parts_source, arrow_dataset(parts, format="ipc", filesystem=fs)
+                    )
+                    con.execute(
+                        f"INSERT INTO {name} BY NAME SELECT * FROM {parts_source};"
+                    )
+                # The table must have the same rows as the cache (e.g. unless an
+                #  earlier load failed); otherwise the whole table is replaced
+                (table_rows,) = con.sql(f"SELECT count(*) FROM {name}").fetchone()
+                (cache_rows,) = con.sql(f"SELECT count(*) FROM {cache}").fetchone()
+            except Exception:
+                con.execute("ROLLBACK;")
+                raise
+            if table_rows == cache_rows:
+                con.execute("COMMIT;")
+                return True
+            con.execute("ROLLBACK;")
+            replace_table(con, name, cache)
+            return True
+        if result.kind in ("table", "append"):
+            data = result.data
+            if isinstance(data, pl.DataFrame):
+                con.register(source, data.to_arrow())
+                relation = source
+            elif isinstance(data, pd.DataFrame):
+                con.register(source, data)
+                relation = source
+            else:
+                # Updated in a worker process or lazily; read from the cache
+                relation = _register_cache(con, name, result.cache_path)
+            replace_table(con, name, relation)
+            return True
+        return False
+    finally:
+        con.unregister(source)
+        con.unregister(parts_source)
+
+
 def hash_sources(ds: Datasource):
-    """Gets a hash of the source files."""
-    hashes = []
+    """Gets a hash of the source files.
+
+    Files are hashed in chunks (in a pool of threads) and directories (e.g. '.gdb')
+    are hashed by their contents. Hashes are kept by path, size, and modification
+    time in 'cache_dir/.hashes', so unchanged files are not re-read.
+    """
     try:
-        for p in ds.source_files:
-            p: Path = Path(p)
-            if p.is_dir():
-                # raise AttributeError("TODO: Hash cannot be performed on folder")
-                continue
-            with p.open("rb") as f:
-                hashes.append(sha256(f.read()).hexdigest())
+        manifest = ds.source_manifest()
     except Exception:
         raise AttributeError(f"TODO: Hash cannot be performed on {ds.name}")
+    hashes = [manifest.files[p].hash for p in ds.source_files]
     current_hash = sha256("".join(hashes).encode("UTF8")).hexdigest()[:7]
     return current_hash
 
 
-def update_sql(compact_db=False) -> tuple[int, str]:
-    """Update the DuckDB data warehouse."""
-    # Execute built-in
-    with duckdb.connect(DB_PATH) as con:
-        calendar_dim = CalendarDim().data  # noqa: F841
-        con.sql("CREATE OR REPLACE TABLE dim_calendar AS SELECT * FROM calendar_dim;")
-    # Execute SQL from files
-    sql_file_count = 0
-    for sql_file in SQL_FILES:
-        with sql_file.open() as f:
-            sql = f.read()
-            with duckdb.connect(DB_PATH) as con:
-                con.sql(sql)
-        sql_file_count += 1
+def _stale_sql_files(
+    con: duckdb.DuckDBPyConnection,
+    graph: dict[Path, set[Path]],
+    tables: dict[Path, set[str]],
+    hashes: dict[Path, str],
+    changed_tables: Iterable[str] | None,
+) -> set[Path]:
+    """Finds SQL files that must be re-run.
+
+    A file is stale if it is new or was edited (its hash is not in
+    'sql_updates'), if a table it requires was loaded after the file was last
+    run ('table_updates') or is in `changed_tables`, or if a file it depends on
+    is stale or was run after it. Since load and run times are kept in the
+    database, files left stale by an earlier run (e.g. with errors, or with
+    '--skip-db') are re-run. All files are stale if `changed_tables` is None.
+    """
+    if changed_tables is None:
+        return set(graph)
+    changed_tables = {name.lower() for name in changed_tables}
+    _create_update_tables(con)
+    last_runs = {
+        sql_file: (hash_, updated_at)
+        for sql_file, hash_, updated_at in con.sql(
+            "SELECT sql_file, hash, epoch_us(updated_at) FROM sql_updates"
+        ).fetchall()
+    }
+    table_updates = dict(
+        con.sql("SELECT name, epoch_us(updated_at) FROM table_updates").fetchall()
+    )
+    # Microseconds since the epoch
+    updated: dict[Path, int | None] = {}
+    stale: set[Path] = set()
+    for file in TopologicalSorter(graph).static_order():
+        last_hash, updated[file] = last_runs.get(file.name, (None, None))
+        upstream = [table_updates.get(t) for t in tables[file]]
+        upstream += [updated[f] for f in graph[file]]
+        if (
+            last_hash != hashes[file]
+            or updated[file] is None
+            or tables[file] & changed_tables
+            or graph[file] & stale
+            or any(t is not None and t > updated[file] for t in upstream)
+        ):
+            stale.add(file)
+    return stale
+
+
+def update_sql(
+    compact_db=False,
+    wh: Warehouse | None = None,
+    changed_tables: Iterable[str] | None = None,
+    max_workers: int | None = None,
+) -> tuple[int, str]:
+    """Update the DuckDB data warehouse.
+
+    SQL files are run in the order of their dependencies (the tables/views they
+    create and require). With `changed_tables` (e.g. the datasources loaded this
+    run), only SQL files that are new, were edited, or are downstream of a table
+    loaded since they last ran (see `_stale_sql_files`) are re-run; otherwise
+    all SQL files are run. Independent SQL
+    files are run concurrently (up to `max_workers`), each on its own cursor.
+
+    Uses the warehouse session `wh` if given (otherwise a new session). The
+    database can't be compacted while a session is open, so `compact_db` is
+    only allowed without `wh` (call `compact` after closing the session).
+
+    Returns
+    -------
+    tuple[int, str]
+        The number of SQL files executed, and the compaction message.
+    """
+    if compact_db and wh is not None:
+        raise ValueError("Cannot compact the database while a session is open")
+    session = wh or Warehouse()
+    try:
+        con = session.cursor()
+        _create_update_tables(con)
+        # Built-in tables (only re-created when they change)
+        _update_calendar(con)
+        # Execute SQL from files (that are stale)
+        graph, tables = get_sql_dependency_graph(SQL_FILES)
+        hashes = {file: hash_file(file) for file in SQL_FILES}
+        stale = _stale_sql_files(con, graph, tables, hashes, changed_tables)
+
+        def run(sql_file: Path) -> None:
+            cur = session.cursor()
+            with sql_file.open() as f:
+                cur.sql(f.read())
+            cur.execute(
+                "INSERT OR REPLACE INTO sql_updates (sql_file, last_updated, hash, updated_at)"
+                " VALUES (?, current_date, ?, now());",
+                [sql_file.name, hashes[sql_file]],
+            )
+
+        sql_file_count = 0
+        sorter = TopologicalSorter(graph)
+        sorter.prepare()  # Raises graphlib.CycleError
+        running: dict[Future, Path] = {}
+        with ThreadPoolExecutor(max_workers=max_workers) as executor:
+            while sorter.is_active():
+                for sql_file in sorter.get_ready():
+                    if sql_file in stale:
+                        running[executor.submit(run, sql_file)] = sql_file
+                    else:
+                        sorter.done(sql_file)
+                if not running:
+                    continue
+                done, _ = wait(running, return_when=FIRST_COMPLETED)
+                for future in done:
+                    sql_file = running.pop(future)
+                    try:
+                        future.result()
+                    except Exception:
+                        # Let running files finish, but don't start any more
+                        executor.shutdown(wait=True, cancel_futures=True)
+                        raise
+                    sorter.done(sql_file)
+                    sql_file_count += 1
+    finally:
+        if wh is None:
+            session.close()
     # Compact DB
     compact_msg = ""
     if compact_db:
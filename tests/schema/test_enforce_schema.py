@@ -129,3 +129,52 @@ def test_enforce_handle_missing():
     ignore_result = schema.enforce(df, to_schema, handle_missing="ignore")
     ignore_schema = tuple(zip(ignore_result.columns, ignore_result.dtypes))
     assert ignore_schema == to_schema[:-1]
+
+
+def test_enforce_date_formats():
+    df = pl.DataFrame(
+        {
+            "str_date": [
+                "2025-01-02",
+                "1/2/25",
+                "01/02/2025",
+                "January 2, 2025",
+                "2 Jan 2025",  # No format; parsed by dateutil
+                "",
+                None,
+            ],
+        }
+    )
+    result = schema.enforce(df, (("str_date", pl.Date()),), parse_dates=True)
+    assert result["str_date"].to_list() == [dt.date(2025, 1, 2)] * 5 + [None] * 2
+
+
+def test_enforce_duration_formats():
+    df = pl.DataFrame(
+        {
+            "str_duration": [
+                "1 day 02:25:00.5",
+                "1 days, 02:25:00",
+                "2h30m",  # Not HH:MM:SS; parsed by pandas
+                None,
+            ],
+        }
+    )
+    to_schema = (("str_duration", pl.Duration("ms")),)
+    result = schema.enforce(df, to_schema)
+    assert result.dtypes == [pl.Duration("ms")]
+    assert result["str_duration"].to_list() == [
+        dt.timedelta(days=1, hours=2, minutes=25, milliseconds=500),
+        dt.timedelta(days=1, hours=2, minutes=25),
+        dt.timedelta(hours=2, minutes=30),
+        None,
+    ]
+
+
+def test_enforce_lazy():
+    lf = pl.LazyFrame({"str_int": ["42", "12,345"], "TO_DROP": [0, 1]})
+    to_schema = (("str_int", pl.Int32()), ("TO_DROP", None))
+    result = schema.enforce(lf, to_schema)
+    assert isinstance(result, pl.LazyFrame)
+    assert result.collect_schema() == pl.Schema({"str_int": pl.Int32()})
+    assert result.collect()["str_int"].to_list() == [42, 12345]
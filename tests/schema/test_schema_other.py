@@ -54,5 +54,44 @@ def test_apply_sorting():
     assert schema.apply_sorting(df, exp_schema, drop_nonetypes=False).equals(exp_df)
 
 
-# TODO:
-# def test_validate(): ...
+def test_validate_lazy():
+    lf = pl.LazyFrame({"a": [1, 2, 3], "b": ["one", "two", "three"]})
+    exp_schema = (("b", pl.String), ("a", pl.Int64), ("c", None))
+    assert isinstance(schema.validate(lf, exp_schema), pl.LazyFrame)
+    with pytest.raises(pl.exceptions.SchemaError):
+        schema.validate(lf, (("a", pl.Int8), ("b", pl.String)))
+
+
+def test_check_names_lazy():
+    lf = pl.LazyFrame({"a": [1, 2, 3], "z": [4, 5, 6]})
+    with pytest.raises(pl.exceptions.SchemaError):
+        schema.check_names(lf, (("a", pl.Int8),))
+
+
+def test_overrides():
+    exp_schema = (("id", pl.String), ("count", pl.Int32), ("notes", None))
+    assert schema.overrides(exp_schema) == pl.Schema(
+        {"id": pl.String, "count": pl.Int32}
+    )
+    assert schema.overrides(exp_schema, ["id"]) == pl.Schema({"id": pl.String})
+
+
+def test_schema_class():
+    exp_schema = schema.Schema({"a": pl.Int32, "b": pl.String, "c": None})
+    assert "a" in exp_schema and len(exp_schema) == 3
+    assert exp_schema.to_polars() == pl.Schema({"a": pl.Int32, "b": pl.String})
+    # Compiled once per input schema
+    files = [
+        pl.DataFrame({"a": ["1"], "b": ["one"], "c": [0]}),
+        pl.DataFrame({"a": ["2"], "b": ["two"], "c": [1]}),
+    ]
+    results = [exp_schema.enforce(df) for df in files]
+    assert len(exp_schema._compiled) == 1
+    assert pl.concat(results).equals(
+        pl.DataFrame(
+            {"a": [1, 2], "b": ["one", "two"]}, schema={"a": pl.Int32, "b": pl.String}
+        )
+    )
+    assert schema.enforce(files[0], exp_schema).equals(results[0])
+    exp_schema.validate(results[0])
+    exp_schema.check_names(files[0])
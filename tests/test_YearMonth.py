@@ -1,6 +1,7 @@
 """Tests for YearMonth object."""
 
 import datetime as dt
+import pickle
 import sys
 from pathlib import Path
 
@@ -149,3 +150,71 @@ def test_valid_year_month_combinations(year, month):
     ym = YearMonth(yearmonth)
     assert ym.year == year
     assert ym.month == month
+
+
+def test_expr_helpers():
+    df = pl.DataFrame({"YMTH": [202401, 202406, 202407, 202412]})
+    out = df.select(
+        pl.col("YMTH").ymth.to_date().alias("first"),
+        pl.col("YMTH").ymth.to_last_date().alias("last"),
+        pl.col("YMTH").ymth.add_months(-7).alias("prev"),
+        pl.col("YMTH").ymth.add_months(1).alias("next"),
+        pl.col("YMTH").ymth.fiscal_year().alias("FY"),
+        pl.col("YMTH").ymth.fiscal_year(label=True).alias("FYLabel"),
+        pl.col("YMTH").ymth.fiscal_quarter().alias("FQ"),
+    )
+    assert out["first"].to_list()[0] == dt.date(2024, 1, 1)
+    assert out["last"].to_list()[0] == dt.date(2024, 1, 31)
+    assert out["prev"].to_list() == [202306, 202311, 202312, 202405]
+    assert out["next"].to_list() == [202402, 202407, 202408, 202501]
+    assert out["FY"].to_list() == [2024, 2024, 2025, 2025]
+    assert out["FYLabel"].to_list() == ["FY24", "FY24", "FY25", "FY25"]
+    assert out["FQ"].to_list() == [3, 4, 1, 2]
+
+
+def test_from_date_expr():
+    df = pl.DataFrame({"Date": [dt.datetime(2024, 1, 31, 23), None]})
+    out = df.select(
+        YearMonth.from_date_expr("Date"), pl.col("Date").ymth.from_date().alias("ns")
+    )
+    assert out["Date"].to_list() == [202401, None]
+    assert out["ns"].to_list() == [202401, None]
+
+
+def test_interned():
+    ym = YearMonth(202401)
+    assert YearMonth("202401") is ym
+    assert YearMonth(ym) is ym
+    assert pickle.loads(pickle.dumps(ym)) is ym
+    with pytest.raises(AttributeError):
+        ym.__dict__
+
+
+def test_arithmetic():
+    ym = YearMonth(202401)
+    assert ym + 1 == YearMonth(202402)
+    assert 12 + ym == YearMonth(202501)
+    assert ym - 1 == YearMonth(202312)
+    assert ym + -25 == YearMonth(202112)
+    assert YearMonth(202503) - ym == 14
+    assert YearMonth.from_index(ym.index) is ym
+
+
+def test_range():
+    assert YearMonth.range(202311, 202402).to_list() == [202311, 202312, 202401, 202402]
+    assert YearMonth.range(202402, 202311, -2).to_list() == [202402, 202312]
+    assert YearMonth.range(202401, 202401).to_list() == [202401]
+    assert YearMonth.range(202402, 202311).len() == 0
+
+
+def test_validate():
+    s = pl.Series([202401, None, 202412])
+    assert YearMonth.validate(s).to_list() == [202401, None, 202412]
+    assert YearMonth.validate(pl.Series(["202401"])).to_list() == [202401]
+    with pytest.raises(ValueError):
+        YearMonth.validate(pl.Series(["202401", "abcdef"]))
+    with pytest.raises(ValueError):
+        YearMonth.validate(pl.Series([12345, 202413]))
+    df = pl.DataFrame({"YMTH": [202401, 202413, None]})
+    valid = df.select(pl.col("YMTH").ymth.is_valid()).to_series()
+    assert valid.to_list() == [True, False, None]
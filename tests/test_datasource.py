@@ -0,0 +1,257 @@
+"""Tests for datasource updates and caches (with a temporary config)."""
+
+import sys
+from pathlib import Path
+
+import polars as pl
+import pytest
+
+sys.path.append(r"C:\Workspace\tmpdb\.BoltETL")
+from bolt.datasources import Datasource
+from bolt.utils import config, rules
+
+
+class Trips(Datasource):
+    def transform(self):
+        self.data = pl.concat(
+            [df for _, df in self.raw], how="vertical_relaxed"
+        ).with_columns(YMTH=pl.col("Date").str.to_date().dt.strftime("%Y%m").cast(int))
+
+
+@pytest.fixture
+def metadata(tmp_path, monkeypatch):
+    """Metadata of the `Trips` datasource (change before creating a `Trips`)."""
+    for d in ("cache", "logs", "raw"):
+        tmp_path.joinpath(d).mkdir()
+    metadata = {
+        "name": "Trips",
+        "source_dir": str(tmp_path / "raw"),
+        "filename": "*.csv",
+        "def_path": __file__,
+    }
+    monkeypatch.setattr(config, "metadata", {"Trips": metadata})
+    monkeypatch.setattr(config, "cache_dir", tmp_path / "cache")
+    monkeypatch.setattr(config, "log_dir", tmp_path / "logs")
+    return metadata
+
+
+def write_source(metadata, name: str, dates: list[str]):
+    path = f"{metadata['source_dir']}/{name}.csv"
+    pl.DataFrame({"Date": dates, "Value": range(len(dates))}).write_csv(path)
+    return path
+
+
+def test_update_incremental(metadata):
+    metadata["incremental"] = True
+    write_source(metadata, "a", ["2025-01-01", "2025-01-02"])
+    d = Trips()
+    d.update(download=False)
+    # First update: the whole table is replaced
+    assert d.appended_parts is None
+    assert d.read_cache().data.height == 2
+
+    write_source(metadata, "b", ["2025-02-01"])
+    d = Trips()
+    d.update(download=False)
+    assert d.appended_parts == [d._part_path(f"{metadata['source_dir']}/b.csv")]
+    assert pl.read_ipc(d.appended_parts[0]).height == 1
+    assert d.read_cache().data.height == 3
+
+    # Nothing new to append (e.g. re-run after a failed load): replace the table
+    d = Trips()
+    d.update(download=False, force=True)
+    assert d.appended_parts is None
+    assert d.read_cache().data.height == 3
+
+
+def test_update_validates_cache(metadata):
+    write_source(metadata, "a", ["2025-01-01", "2025-01-02"])
+    d = Trips()
+    d.rules = [rules.in_range("Value", max=1)]
+    d.update(download=False)
+    assert "validate" in d.timings
+    write_source(metadata, "b", ["2025-02-01", "2025-02-02", "2025-02-03"])
+    d = Trips()
+    d.rules = [rules.in_range("Value", max=1)]
+    with pytest.raises(rules.ValidationError):
+        d.update(download=False)
+    # The (lazy) data is validated before it replaces the cache
+    assert d.read_cache().data.height == 2
+    assert not Trips().is_cache_fresh()
+    assert sorted(p.name for p in config.cache_dir.glob("Trips*")) == ["Trips.arrow"]
+
+
+class CheckedTrips(Trips):
+    """Validates without rules, overriding `validate` (without `data`)."""
+
+    def validate(self):
+        if self.data.select(pl.col("Value").max()).collect().item() > 1:
+            raise rules.ValidationError("Value > 1")
+
+
+@pytest.mark.parametrize("partitioned", [False, True])
+def test_update_validate_override(metadata, monkeypatch, partitioned):
+    if partitioned:
+        metadata["cache_partition_by"] = "YMTH"
+    monkeypatch.setitem(config.metadata, "CheckedTrips", metadata)
+    write_source(metadata, "a", ["2025-01-01", "2025-01-02"])
+    CheckedTrips().update(download=False)
+    write_source(metadata, "b", ["2025-02-01", "2025-02-02", "2025-02-03"])
+    d = CheckedTrips()
+    with pytest.raises(rules.ValidationError):
+        d.update(download=False)
+    assert d.read_cache().data.height == 2
+
+
+def test_update_incremental_validates_parts(metadata):
+    metadata["incremental"] = True
+    path = write_source(metadata, "a", ["2025-01-01", "2025-01-02"])
+    d = Trips()
+    d.rules = [rules.in_range("Value", max=1)]
+    d.update(download=False)
+    part = pl.read_ipc(d._part_path(path))
+    # A changed file that fails keeps its previous part
+    write_source(metadata, "a", ["2025-01-01", "2025-01-02", "2025-01-03"])
+    d = Trips()
+    d.rules = [rules.in_range("Value", max=1)]
+    with pytest.raises(rules.ValidationError):
+        d.update(download=False)
+    assert pl.read_ipc(d._part_path(path)).equals(part)
+    # No temporary files are left
+    assert {p.name for p in d.parts_dir.iterdir()} == {
+        "manifest.json",
+        d._part_path(path).name,
+    }
+
+
+@pytest.mark.parametrize("cache_format", ["DISABLE", "feather"])
+def test_unsupported_cache_format(metadata, cache_format):
+    metadata["cache_format"] = cache_format
+    with pytest.raises(ValueError, match="Unsupported cache_format"):
+        Trips()
+
+
+@pytest.mark.parametrize("incremental", [False, True])
+def test_update_returns(metadata, incremental):
+    metadata["incremental"] = incremental
+    write_source(metadata, "a", ["2025-01-01", "2025-01-02"])
+    # The same kind of data whether updated or skipped (cache is fresh)
+    for _ in range(2):
+        assert isinstance(Trips().update(download=False), pl.DataFrame)
+        lf = Trips().update(download=False, lazy=True)
+        assert isinstance(lf, pl.LazyFrame)
+        assert lf.collect().height == 2
+
+
+def test_write_partitions(metadata):
+    metadata["cache_partition_by"] = "YMTH"
+    d = Trips()
+    assert d.cache_format == "parquet"
+    d.data = pl.DataFrame({"YMTH": [202501, 202501, 202502], "Value": [1, 2, 3]})
+    d.write_cache()
+    assert list(d.cache_partitions()) == [202501, 202502]
+    assert d.cache_partitions()[202501] == d.cache_path / "YMTH=202501/part.parquet"
+    # Only the partitions in the data are re-written
+    d.data = pl.DataFrame({"YMTH": [202503], "Value": [4]}).lazy()
+    d.write_cache(replace=False)
+    assert list(d.cache_partitions()) == [202501, 202502, 202503]
+    assert isinstance(d.data, pl.LazyFrame)
+    assert not list(config.cache_dir.glob("*.tmp.parquet"))
+    # Partitions that are in `replace` but not in the data are removed
+    d.data = pl.DataFrame({"YMTH": [202502], "Value": [5]})
+    d.write_cache(replace={202501})
+    assert list(d.cache_partitions()) == [202502, 202503]
+    assert d.read_cache().data["Value"].sort().to_list() == [4, 5]
+    # Partitions that are not in the data are removed
+    d.data = pl.DataFrame({"YMTH": [202502], "Value": [5]})
+    d.write_cache()
+    assert list(d.cache_partitions()) == [202502]
+
+
+def test_read_cache_ymth_range(metadata):
+    metadata["cache_partition_by"] = "YMTH"
+    d = Trips()
+    d.data = pl.DataFrame({"YMTH": [202412, 202501, 202502], "Value": [1, 2, 3]})
+    d.write_cache()
+    df = d.read_cache(ymth_range=(202501, 202512)).data
+    assert df["YMTH"].to_list() == [202501, 202502]
+    lf = d.read_cache(ymth_range=(202601, 202612), lazy=True).data
+    assert lf.collect().is_empty()
+    assert lf.collect_schema() == d.scan_cache().collect_schema()
+
+
+def test_update_incremental_partitions(metadata):
+    metadata["incremental"] = True
+    metadata["cache_partition_by"] = "YMTH"
+    write_source(metadata, "jan", ["2025-01-01", "2025-01-02"])
+    feb = write_source(metadata, "feb", ["2025-02-01"])
+    d = Trips()
+    d.update(download=False)
+    partitions = d.cache_partitions()
+    assert list(partitions) == [202501, 202502]
+    mtimes = {v: p.stat().st_mtime_ns for v, p in partitions.items()}
+
+    # A new file in March and a changed file in February
+    write_source(metadata, "mar", ["2025-03-01"])
+    write_source(metadata, "feb", ["2025-02-01", "2025-02-02"])
+    d = Trips()
+    d.update(download=False)
+    # Not appended (a file changed); only the touched partitions are re-written
+    assert d.appended_parts is None
+    partitions = d.cache_partitions()
+    assert list(partitions) == [202501, 202502, 202503]
+    assert partitions[202501].stat().st_mtime_ns == mtimes[202501]
+    assert partitions[202502].stat().st_mtime_ns != mtimes[202502]
+    assert d.read_cache().data.height == 5
+
+    # A removed file removes its partition (and part)
+    Path(feb).unlink()
+    d = Trips()
+    d.update(download=False)
+    assert list(d.cache_partitions()) == [202501, 202503]
+    assert not d._part_path(feb).exists()
+
+
+def test_write_partitions_nulls(metadata):
+    metadata["cache_partition_by"] = "YMTH"
+    d = Trips()
+    d.data = pl.DataFrame({"YMTH": [202501], "Value": [1]})
+    d.write_cache()
+    for data in (
+        pl.DataFrame({"YMTH": [202501, None], "Value": [1, 2]}),
+        pl.LazyFrame({"YMTH": [202501, None], "Value": [1, 2]}),
+    ):
+        d.data = data
+        with pytest.raises(ValueError, match="Null values in partition column"):
+            d.write_cache()
+        # The existing cache is left as it was
+        assert d.read_cache().data["Value"].to_list() == [1]
+    assert not list(config.cache_dir.glob("*.tmp.parquet"))
+
+
+def test_write_partitions_strings(metadata):
+    metadata["cache_partition_by"] = "Route"
+    d = Trips()
+    d.data = pl.DataFrame({"Route": ["01", "1", "A"], "Value": [1, 2, 3]})
+    d.write_cache()
+    d.write_cache(replace={"01", "1", "A"})
+    assert sorted(p.parent.name for p in d.cache_partitions().values()) == [
+        "Route=01",
+        "Route=1",
+        "Route=A",
+    ]
+
+
+@pytest.mark.parametrize("compression", ["uncompressed", "zstd"])
+def test_read_cache_memory_map(metadata, compression):
+    metadata["cache_compression"] = compression
+    d = Trips()
+    d.data = pl.DataFrame(
+        {"YMTH": [202501, 202502] * 500, "Route": ["1", "12"] * 500, "Value": 1.5}
+    )
+    d.write_cache()
+    mapped = Trips().read_cache(memory_map=True).data
+    read = Trips().read_cache(memory_map=False).data
+    assert mapped.equals(read)
+    assert mapped.equals(d.data)
+    assert read.n_chunks() == 1
@@ -0,0 +1,150 @@
+"""Tests for downloads (against a local HTTP server)."""
+
+import io
+import sys
+import threading
+import zipfile
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import pytest
+
+sys.path.append(r"C:\Workspace\tmpdb\.BoltETL")
+from bolt.utils import download, download_many
+
+FILES: dict[str, bytes] = {}
+# Requests received (path, status)
+REQUESTS: list[tuple[str, int]] = []
+# Paths to cut off halfway through (once), to simulate a dropped connection
+INTERRUPT: set[str] = set()
+
+
+class Handler(BaseHTTPRequestHandler):
+    """Serves `FILES` with ETags, conditional requests, and range requests."""
+
+    def log_message(self, *args):
+        return
+
+    def respond(self, status: int, headers: dict | None = None):
+        REQUESTS.append((self.path, status))
+        self.send_response(status)
+        for k, v in (headers or {}).items():
+            self.send_header(k, v)
+        self.end_headers()
+        return
+
+    def do_GET(self):
+        path = self.path.split("?")[0]
+        if path not in FILES:
+            return self.respond(404, {"Content-Length": "0"})
+        content = FILES[path]
+        etag = f'"{hash(content)}"'
+        if self.headers.get("If-None-Match") == etag:
+            return self.respond(304)
+        start = 0
+        range_ = self.headers.get("Range")
+        if range_ and self.headers.get("If-Range") == etag:
+            start = int(range_.split("=")[1].rstrip("-"))
+        if start > len(content):
+            return self.respond(416, {"Content-Length": "0"})
+        body = content[start:]
+        headers = {"ETag": etag, "Content-Length": str(len(body))}
+        if start:
+            headers["Content-Range"] = (
+                f"bytes {start}-{len(content) - 1}/{len(content)}"
+            )
+        self.respond(206 if start else 200, headers)
+        if path in INTERRUPT:
+            INTERRUPT.remove(path)
+            body = body[: len(body) // 2]
+        self.wfile.write(body)
+        return
+
+
+@pytest.fixture(scope="module")
+def server():
+    httpd = ThreadingHTTPServer(("127.0.0.1", 0), Handler)
+    thread = threading.Thread(target=httpd.serve_forever, daemon=True)
+    thread.start()
+    yield f"http://127.0.0.1:{httpd.server_address[1]}"
+    httpd.shutdown()
+    httpd.server_close()
+
+
+@pytest.fixture(autouse=True)
+def reset():
+    FILES.clear()
+    REQUESTS.clear()
+    INTERRUPT.clear()
+
+
+def test_download_conditional(server, tmp_path):
+    FILES["/data.csv"] = b"a,b\n1,2\n" * 1000
+    download(f"{server}/data.csv", tmp_path, chunk_size=100)
+    assert tmp_path.joinpath("data.csv").read_bytes() == FILES["/data.csv"]
+    # Unchanged: not downloaded again
+    download(f"{server}/data.csv", tmp_path)
+    assert REQUESTS == [("/data.csv", 200), ("/data.csv", 304)]
+    # Changed
+    FILES["/data.csv"] = b"a,b\n3,4\n"
+    download(f"{server}/data.csv", tmp_path)
+    assert tmp_path.joinpath("data.csv").read_bytes() == FILES["/data.csv"]
+    # Downloaded again if the file was removed
+    tmp_path.joinpath("data.csv").unlink()
+    download(f"{server}/data.csv", tmp_path)
+    assert tmp_path.joinpath("data.csv").exists()
+    assert [status for _, status in REQUESTS] == [200, 304, 200, 200]
+
+
+def test_download_resume(server, tmp_path):
+    FILES["/big.bin"] = bytes(range(256)) * 4000
+    INTERRUPT.add("/big.bin")
+    with pytest.raises(Exception):
+        download(f"{server}/big.bin", tmp_path)
+    assert not tmp_path.joinpath("big.bin").exists()
+    download(f"{server}/big.bin", tmp_path)
+    assert tmp_path.joinpath("big.bin").read_bytes() == FILES["/big.bin"]
+    assert [status for _, status in REQUESTS] == [200, 206]
+    assert sorted(p.name for p in tmp_path.iterdir()) == [
+        "_big.bin.download.json",
+        "big.bin",
+    ]
+
+
+def test_download_resume_changed(server, tmp_path):
+    FILES["/big.bin"] = b"0" * 100_000
+    INTERRUPT.add("/big.bin")
+    with pytest.raises(Exception):
+        download(f"{server}/big.bin", tmp_path)
+    # The file changed since the partial download: start over
+    FILES["/big.bin"] = b"1" * 50_000
+    download(f"{server}/big.bin", tmp_path)
+    assert tmp_path.joinpath("big.bin").read_bytes() == FILES["/big.bin"]
+    assert [status for _, status in REQUESTS] == [200, 200]
+
+
+def test_download_zip(server, tmp_path):
+    buffer = io.BytesIO()
+    with zipfile.ZipFile(buffer, "w") as zf:
+        zf.writestr("Parcels.gdb/", b"")
+        zf.writestr("Parcels.gdb/a00000001.gdbtable", b"table" * 1000)
+        zf.writestr("readme.txt", b"readme")
+    FILES["/Parcels.zip"] = buffer.getvalue()
+    download(f"{server}/Parcels.zip", tmp_path, chunk_size=64)
+    assert tmp_path.joinpath("Parcels.gdb", "a00000001.gdbtable").exists()
+    assert tmp_path.joinpath("readme.txt").read_bytes() == b"readme"
+    # The ZIP file itself is not kept
+    assert not list(tmp_path.glob("*.zip"))
+    download(f"{server}/Parcels.zip", tmp_path)
+    assert REQUESTS[-1] == ("/Parcels.zip", 304)
+
+
+def test_download_many(server, tmp_path):
+    for i in range(5):
+        FILES[f"/{i}.csv"] = str(i).encode() * 1000
+    urls = [(f"{server}/{i}.csv", tmp_path / str(i % 2)) for i in range(5)]
+    urls.append((f"{server}/missing.csv", tmp_path))
+    results = download_many(urls, max_workers=3)
+    assert isinstance(results[f"{server}/missing.csv"], Exception)
+    for i in range(5):
+        assert results[f"{server}/{i}.csv"] == tmp_path / str(i % 2)
+        assert (tmp_path / str(i % 2) / f"{i}.csv").read_bytes() == FILES[f"/{i}.csv"]
@@ -0,0 +1,39 @@
+"""Tests for file hashing functions."""
+
+import hashlib
+import sys
+
+sys.path.append(r"C:\Workspace\tmpdb\.BoltETL")
+from bolt.utils import hash_file, hash_path, hash_paths
+
+
+def test_hash_file_chunked(tmp_path):
+    content = b"0123456789" * 1000
+    p = tmp_path / "data.csv"
+    p.write_bytes(content)
+    expected = hashlib.sha256(content).hexdigest()
+    assert hash_file(p) == expected
+    assert hash_file(p, chunk_size=7) == expected
+    assert hash_file(p, "blake2b") == hashlib.blake2b(content).hexdigest()
+
+
+def test_hash_directory(tmp_path):
+    gdb = tmp_path / "Parcels.gdb"
+    gdb.joinpath("sub").mkdir(parents=True)
+    gdb.joinpath("a0000001.gdbtable").write_bytes(b"table")
+    gdb.joinpath("sub", "gdb").write_bytes(b"gdb")
+    before = hash_path(gdb)
+    assert before == hash_path(gdb)
+    gdb.joinpath("sub", "gdb").write_bytes(b"changed")
+    assert hash_path(gdb) != before
+
+
+def test_hash_paths(tmp_path):
+    paths = []
+    for i in range(5):
+        p = tmp_path / f"{i}.csv"
+        p.write_text(str(i))
+        paths.append(str(p))
+    hashes = hash_paths(paths, max_workers=3)
+    assert list(hashes) == paths
+    assert hashes == {p: hash_file(p) for p in paths}
@@ -0,0 +1,58 @@
+"""Tests for the source file Manifest."""
+
+import os
+import sys
+
+sys.path.append(r"C:\Workspace\tmpdb\.BoltETL")
+from bolt.utils import Manifest
+
+
+def write(path, content: str, mtime: float):
+    path.write_text(content)
+    os.utime(path, (mtime, mtime))
+    return str(path)
+
+
+def test_diff(tmp_path):
+    a = write(tmp_path / "202501_a.csv", "a\n1\n", 1000)
+    b = write(tmp_path / "202502_b.csv", "b\n2\n", 1000)
+    previous = Manifest.from_files([a, b])
+
+    c = write(tmp_path / "202503_c.csv", "c\n3\n", 1000)
+    write(tmp_path / "202502_b.csv", "b\n22\n", 2000)
+    current = Manifest.from_files([b, c], previous)
+    assert previous.diff(current) == ([c], [b], [a])
+
+
+def test_unchanged_files_not_rehashed(tmp_path):
+    a = write(tmp_path / "a.csv", "a\n1\n", 1000)
+    previous = Manifest.from_files([a])
+    previous.files[a].hash = "not-rehashed"
+    # Same size and modification time
+    current = Manifest.from_files([a], previous)
+    assert current.files[a].hash == "not-rehashed"
+    assert previous.diff(current) == ([], [], [])
+
+
+def test_dump_load(tmp_path):
+    a = write(tmp_path / "a.csv", "a\n1\n", 1000)
+    manifest = Manifest.from_files([a])
+    manifest_path = tmp_path / "manifest" / "manifest.json"
+    manifest.dump(manifest_path)
+    assert Manifest.load(manifest_path) == manifest
+    assert Manifest.load(tmp_path / "missing.json").files == {}
+
+
+def test_directory_renames_rehashed(tmp_path):
+    gdb = tmp_path / "Parcels.gdb"
+    gdb.mkdir()
+    write(gdb / "a00000001.gdbtable", "aaaa", 1000)
+    write(gdb / "a00000002.gdbtable", "bbbb", 1000)
+    os.utime(gdb, (1000, 1000))
+    previous = Manifest.from_files([str(gdb)])
+    # Swap two files of the same size (with their old modification times)
+    os.rename(gdb / "a00000001.gdbtable", gdb / "tmp")
+    os.rename(gdb / "a00000002.gdbtable", gdb / "a00000001.gdbtable")
+    os.rename(gdb / "tmp", gdb / "a00000002.gdbtable")
+    current = Manifest.from_files([str(gdb)], previous)
+    assert previous.diff(current) == ([], [str(gdb)], [])
@@ -0,0 +1,128 @@
+"""Tests for datasource update scheduling."""
+
+import os
+import sys
+from graphlib import CycleError
+
+import pytest
+
+sys.path.append(r"C:\Workspace\tmpdb\.BoltETL")
+from bolt import pipeline
+from bolt.pipeline import UpdateResult
+
+
+class FakeUpdates:
+    """Replaces `pipeline.update_datasource`, recording the datasources updated."""
+
+    def __init__(self):
+        self.ran: list[str] = []
+        self.downloaded: list[str] = []
+        # Datasources whose output doesn't change, and that raise an error
+        self.unchanged: set[str] = set()
+        self.failing: set[str] = set()
+
+    def __call__(self, name, download=True, keep_data=False, track_changes=False):
+        self.ran.append(name)
+        if download:
+            self.downloaded.append(name)
+        if name in self.failing:
+            raise RuntimeError(f"{name} failed")
+        return UpdateResult(name=name, changed=name not in self.unchanged)
+
+
+@pytest.fixture
+def updates(monkeypatch):
+    fake = FakeUpdates()
+    monkeypatch.setattr(pipeline, "update_datasource", fake)
+    return fake
+
+
+def update_in_worker(name, download=True, keep_data=False, track_changes=False):
+    """Replaces `pipeline.update_datasource` in worker processes (must be picklable)."""
+    if name.startswith("Fail"):
+        raise RuntimeError(f"{name} failed")
+    # The ID of the process that ran the update
+    return UpdateResult(name=name, data=os.getpid())
+
+
+def run(graph, stale):
+    return {r.name: r for r in pipeline.update_graph(graph, stale)}
+
+
+def test_get_dependency_graph(monkeypatch):
+    metadata = {
+        "A": {},
+        "B": {"depends_on": "A"},
+        "C": {"depends_on": ["A", "B"]},
+        "D": {"depends_on": ["Other"]},
+        "Other": {},
+    }
+    monkeypatch.setattr(pipeline.config, "metadata", metadata)
+    graph = pipeline.get_dependency_graph(["A", "B", "C", "D"])
+    # Dependencies that aren't being updated are left out
+    assert graph == {"A": set(), "B": {"A"}, "C": {"A", "B"}, "D": set()}
+    metadata["D"]["depends_on"] = ["Missing"]
+    with pytest.raises(KeyError):
+        pipeline.get_dependency_graph(["D"])
+
+
+GRAPH = {"A": set(), "B": {"A"}, "C": {"B"}, "D": set()}
+
+
+def test_update_graph_order(updates):
+    results = run(GRAPH, stale=GRAPH)
+    ran = updates.ran
+    assert ran.index("A") < ran.index("B") < ran.index("C")
+    assert all(r.changed and not r.skipped for r in results.values())
+
+
+def test_update_graph_skips_unchanged(updates):
+    # A changed, so B is re-run; B's output didn't change, so C is skipped
+    updates.unchanged.add("B")
+    results = run(GRAPH, stale={"A"})
+    assert updates.ran == ["A", "B"]
+    assert results["C"].skipped and not results["C"].changed
+    assert results["D"].skipped and not results["D"].changed
+    assert not results["B"].changed
+
+
+def test_update_graph_failed_dependency(updates):
+    updates.failing.add("A")
+    results = run(GRAPH, stale=GRAPH)
+    assert "A failed" in str(results["A"].error)
+    # Dependents aren't updated, and fail too
+    assert "Dependencies failed" in str(results["B"].error)
+    assert "Dependencies failed" in str(results["C"].error)
+    assert results["D"].error is None
+    assert sorted(updates.ran) == ["A", "D"]
+
+
+def test_update_graph_cycle(updates):
+    with pytest.raises(CycleError):
+        run({"A": {"B"}, "B": {"A"}}, stale={"A"})
+    assert updates.ran == []
+
+
+def test_update_graph_download(updates):
+    list(pipeline.update_graph(GRAPH, GRAPH, download=["B"]))
+    assert updates.downloaded == ["B"]
+    list(pipeline.update_graph(GRAPH, GRAPH, download=False))
+    assert updates.downloaded == ["B"]
+
+
+def test_update_many_parallel(monkeypatch):
+    monkeypatch.setattr(pipeline, "update_datasource", update_in_worker)
+    results = {r.name: r for r in pipeline.update_many(["A", "B", "C"], jobs=2)}
+    assert sorted(results) == ["A", "B", "C"]
+    assert all(r.error is None and r.changed for r in results.values())
+    # Updated in worker processes
+    assert os.getpid() not in {r.data for r in results.values()}
+
+
+def test_update_many_parallel_failure(monkeypatch):
+    monkeypatch.setattr(pipeline, "update_datasource", update_in_worker)
+    results = {r.name: r for r in pipeline.update_many(["A", "FailB"], jobs=2)}
+    # Errors in workers are returned on the result, not raised
+    assert isinstance(results["FailB"].error, RuntimeError)
+    assert "FailB failed" in str(results["FailB"].error)
+    assert results["A"].error is None
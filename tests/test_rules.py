@@ -0,0 +1,57 @@
+"""Tests for data quality rules."""
+
+import sys
+
+import polars as pl
+
+sys.path.append(r"C:\Workspace\tmpdb\.BoltETL")
+from bolt.utils import rules
+
+DF = pl.DataFrame(
+    {
+        "id": [1, 2, 2, 4, None],
+        "route": ["1", "12", "x", "123", "7"],
+        "value": [0.0, 5.5, -1.0, 11.0, None],
+    }
+)
+RULES = [
+    rules.not_null("id"),
+    rules.unique("id"),
+    rules.in_range("value", min=0, max=10),
+    rules.matches("route", r"^\d{1,3}$"),
+    rules.is_in("route", ["1", "12", "123"], severity="warn"),
+]
+
+
+def test_check():
+    report = rules.check(DF, RULES)
+    assert report.results["violations"].to_list() == [1, 2, 2, 1, 2]
+    assert report.results["rows"].to_list() == [5] * 5
+    assert not report.passed
+    assert report.failed().height == 5
+    assert rules.violations(DF, RULES[2])["value"].to_list() == [-1.0, 11.0]
+
+
+def test_check_lazy_passed():
+    report = rules.check(DF.lazy().filter(pl.col("id") == 1), RULES)
+    assert report.passed
+    assert report.results["violations"].sum() == 0
+
+
+def test_warnings_pass():
+    report = rules.check(DF.filter(pl.col("route") == "7"), RULES[-1:])
+    assert report.results["violations"].to_list() == [1]
+    assert report.passed
+
+
+def test_sample():
+    df = pl.DataFrame({"id": range(100_000)})
+    sample, share = rules.sample_rows(df.lazy(), 0.1)
+    rows = sample.select(pl.len()).collect().item()
+    assert share == 0.1
+    assert 9_000 < rows < 11_000
+    # Repeatable
+    assert sample.collect().equals(rules.sample_rows(df, 0.1)[0])
+    report = rules.check(df, [rules.not_null("id")], sample=1_000)
+    assert 800 < report.results["rows"].item() < 1_200
+    assert report.sample == 0.01
@@ -0,0 +1,78 @@
+"""Tests for service day functions."""
+
+import datetime as dt
+import sys
+
+sys.path.append(r"C:\Workspace\tmpdb\.BoltETL")
+import polars as pl
+from polars.testing import assert_frame_equal
+
+from bolt.utils import config, servicedays
+
+
+def test_full_calendar_many():
+    df = servicedays.get_full_calendar_many(202112, 202201)
+    assert df.columns == ["Date", "DayName", "Service", "Holiday"]
+    assert df.height == 62
+    assert df["Date"].is_sorted()
+    assert_frame_equal(
+        df.filter(pl.col("Date").dt.year() == 2022),
+        servicedays.get_full_calendar(2022, 1),
+    )
+
+
+def test_service_days_many():
+    df = servicedays.get_service_days_many(202112, 202407)
+    for ymth in (202112, 202407):
+        month = df.filter(pl.col("YMTH") == ymth)
+        assert "Closed" in month["Service"]
+        assert month["Service"][-1] == "Total"
+        days = month.filter(pl.col("Service") != "Total")["DayCount"].sum()
+        assert days == month.filter(pl.col("Service") == "Total")["DayCount"].item()
+    assert_frame_equal(
+        df.filter(pl.col("YMTH") == 202407),
+        servicedays.get_service_days(2024, 7),
+    )
+
+
+def test_service_calendar_cached():
+    cal = servicedays.get_service_calendar(202201)
+    assert servicedays.get_service_calendar(202407) is cal
+
+
+def test_add_service():
+    cal = servicedays.get_full_calendar_many(202112, 202407)
+    df = cal.select("Date")
+    assert_frame_equal(servicedays.add_service(df), cal.select("Date", "Service"))
+    lazy = servicedays.add_service(df.lazy())
+    assert isinstance(lazy, pl.LazyFrame)
+    assert_frame_equal(lazy.collect(), cal.select("Date", "Service"))
+
+
+def test_add_service_datetimes():
+    df = pl.DataFrame({"Timestamp": [dt.datetime(2024, 7, 6, 13, 30), None]})
+    out = servicedays.add_service(df, date_col="Timestamp")
+    assert out["Service"].to_list() == ["Saturday", None]
+
+
+def test_calendar_dim_cache(tmp_path, monkeypatch):
+    monkeypatch.setattr(config, "cache_dir", tmp_path)
+    monkeypatch.setattr(config, "holidays", {"New Year's Day": "Closed"})
+    cal = servicedays.CalendarDim()
+    assert list(tmp_path.joinpath(".calendar").iterdir()) == [cal.cache_path]
+    # A new holiday config has its own cache
+    monkeypatch.setitem(config.holidays, "Christmas Day", "Closed")
+    new = servicedays.CalendarDim()
+    assert new.cache_path != cal.cache_path
+    closed = pl.col("Service") == "Closed"
+    assert new.data.filter(closed).height > cal.data.filter(closed).height
+
+    # Re-used (not re-built) while the holiday config is unchanged
+    def build(self):
+        raise AssertionError("Calendar was re-built")
+
+    monkeypatch.setattr(servicedays.CalendarDim, "build", build)
+    assert_frame_equal(servicedays.CalendarDim().data, new.data)
+    monkeypatch.delitem(config.holidays, "Christmas Day")
+    assert_frame_equal(servicedays.CalendarDim().data, cal.data)
+    assert len(list(tmp_path.joinpath(".calendar").iterdir())) == 2
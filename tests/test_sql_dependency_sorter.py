@@ -0,0 +1,29 @@
+"""Tests for sorting SQL file dependencies."""
+
+import sys
+
+sys.path.append(r"C:\Workspace\tmpdb\.BoltETL")
+from bolt.utils import get_sql_dependency_graph, get_sql_file_dependencies
+
+
+def write(path, sql: str):
+    path.write_text(sql)
+    return path
+
+
+def test_dependency_graph(tmp_path):
+    summary = write(
+        tmp_path / "view_summary.sql",
+        "-- Uses view_orders\nCREATE OR REPLACE VIEW view_summary AS\n"
+        "SELECT * FROM view_orders o JOIN dim_calendar c ON o.Date = c.Date;",
+    )
+    orders = write(
+        tmp_path / "view_orders.sql",
+        "create or replace view view_orders as select * from Orders;",
+    )
+    other = write(tmp_path / "view_other.sql", "SELECT 1;")
+    graph, tables = get_sql_dependency_graph([summary, orders, other])
+    assert graph == {summary: {orders}, orders: set(), other: set()}
+    assert tables == {summary: {"dim_calendar"}, orders: {"orders"}, other: set()}
+    order = get_sql_file_dependencies([summary, orders, other])
+    assert order.index(orders) < order.index(summary)
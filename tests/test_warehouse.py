@@ -0,0 +1,335 @@
+"""Tests for loading datasources into the warehouse."""
+
+import sys
+import zipfile
+
+import duckdb
+import polars as pl
+import pyarrow.compute as pc
+import pytest
+
+sys.path.append(r"C:\Workspace\tmpdb\.BoltETL")
+from bolt import warehouse
+from bolt.pipeline import UpdateResult
+from bolt.utils import YearMonth, funcs
+
+
+@pytest.fixture
+def con():
+    con = duckdb.connect()
+    yield con
+    con.close()
+
+
+def test_fiscal_year_macro(con):
+    warehouse.load_funcs(con)
+    ymths = [199912, 200006, 200007, 202406, 202407, 202412]
+    df = pl.DataFrame({"YMTH": ymths})
+    expected = df.select(YearMonth.fiscal_year_expr("YMTH", label=True)).to_series()
+    sql = con.sql("SELECT fiscal_year(YMTH) AS FY FROM df").pl()["FY"]
+    assert sql.to_list() == expected.to_list() == [funcs.fiscal_year(i) for i in ymths]
+    assert sql.to_list()[:4] == ["FY00", "FY00", "FY01", "FY24"]
+    # Also works with strings
+    assert con.sql("SELECT fiscal_year('202407')").fetchone() == ("FY25",)
+
+
+def test_register_sql_function(con, monkeypatch):
+    monkeypatch.setattr(warehouse, "SQL_FUNCS", list(warehouse.SQL_FUNCS))
+    add = warehouse.SQLFunction(
+        "add_days", lambda x: pc.add(x, 1), ("INTEGER",), "INTEGER"
+    )
+    warehouse.register_sql_function(add)
+    warehouse.load_funcs(con)
+    # Loading again (e.g. for another cursor) is fine
+    warehouse.load_funcs(con.cursor())
+    assert con.sql("SELECT add_days(i::INTEGER) FROM range(3) t(i)").fetchall() == [
+        (1,),
+        (2,),
+        (3,),
+    ]
+    # A function with the same name is replaced
+    warehouse.register_sql_function(
+        warehouse.SQLFunction(
+            "add_days", lambda x: pc.add(x, 7), ("INTEGER",), "INTEGER"
+        )
+    )
+    assert [f.name for f in warehouse.SQL_FUNCS].count("add_days") == 1
+    warehouse.load_funcs(con)
+    assert con.sql("SELECT add_days(1)").fetchone() == (8,)
+
+
+def write_parts(tmp_path, *frames: pl.DataFrame):
+    """Writes Arrow parts and a cache of all of them; returns (cache, parts)."""
+    parts = []
+    for i, df in enumerate(frames):
+        parts.append(tmp_path / f"{i}.arrow")
+        df.write_ipc(parts[-1])
+    cache = tmp_path / "Trips.arrow"
+    pl.concat(frames).write_ipc(cache)
+    return cache, parts
+
+
+def rows(con, name="Trips"):
+    return con.sql(f"SELECT * FROM {name} ORDER BY Id").fetchall()
+
+
+def test_load_table(con, tmp_path):
+    cache, _ = write_parts(tmp_path, pl.DataFrame({"Id": [1, 2]}))
+    result = UpdateResult(name="Trips", cache_path=cache, kind="table")
+    assert warehouse.load_datasource(con, result)
+    assert rows(con) == [(1,), (2,)]
+    # In-memory data is loaded instead of the cache
+    result.data = pl.DataFrame({"Id": [3]})
+    assert warehouse.load_datasource(con, result)
+    assert rows(con) == [(3,)]
+    result.data = pl.DataFrame({"Id": [4]}).to_pandas()
+    assert warehouse.load_datasource(con, result)
+    assert rows(con) == [(4,)]
+
+
+def test_load_table_parquet(con, tmp_path):
+    df = pl.DataFrame({"YMTH": [202501, 202502], "Id": [1, 2]})
+    df.write_parquet(tmp_path / "Trips.parquet")
+    result = UpdateResult("Trips", tmp_path / "Trips.parquet", kind="table")
+    assert warehouse.load_datasource(con, result)
+    assert rows(con) == [(202501, 1), (202502, 2)]
+    # A partitioned cache (the partition column is kept in each file)
+    for (ymth,), part in df.partition_by("YMTH", as_dict=True).items():
+        tmp_path.joinpath("Trips", f"YMTH={ymth}").mkdir(parents=True)
+        part.write_parquet(tmp_path / "Trips" / f"YMTH={ymth}" / "part.parquet")
+    result = UpdateResult("Trips", tmp_path / "Trips", kind="table")
+    assert warehouse.load_datasource(con, result)
+    assert rows(con) == [(202501, 1), (202502, 2)]
+    assert con.sql("DESCRIBE Trips").fetchall()[0][:2] == ("YMTH", "BIGINT")
+
+
+def test_load_unregisters_sources(con, tmp_path):
+    cache, parts = write_parts(tmp_path, pl.DataFrame({"Id": [1]}))
+    warehouse.load_datasource(con, UpdateResult("Trips", cache, kind="table"))
+    # Appends the part, then replaces the table (it no longer matches the cache)
+    result = UpdateResult("Trips", cache, kind="append", parts=parts)
+    warehouse.load_datasource(con, result)
+    assert rows(con) == [(1,)]
+    tables = {name for (name,) in con.sql("SHOW TABLES").fetchall()}
+    assert tables == {"Trips", "table_updates", "sql_updates"}
+    # Nothing to load
+    assert not warehouse.load_datasource(con, UpdateResult("Other"))
+    assert not warehouse._table_exists(con, "Other")
+
+
+def test_load_table_failed(con, tmp_path):
+    cache, _ = write_parts(tmp_path, pl.DataFrame({"Id": [1, 2]}))
+    warehouse.load_datasource(con, UpdateResult("Trips", cache, kind="table"))
+    missing = UpdateResult("Trips", tmp_path / "missing.parquet", kind="table")
+    with pytest.raises(duckdb.IOException):
+        warehouse.load_datasource(con, missing)
+    # The existing table is left as it was
+    assert rows(con) == [(1,), (2,)]
+    assert not warehouse._table_exists(con, "Trips__staging")
+
+
+def test_load_append(con, tmp_path):
+    first, second = pl.DataFrame({"Id": [1, 2]}), pl.DataFrame({"Id": [3]})
+    cache, parts = write_parts(tmp_path, first, second)
+    con.execute("CREATE TABLE Trips AS SELECT * FROM first;")
+    result = UpdateResult("Trips", cache, kind="append", parts=parts[1:])
+    assert warehouse.load_datasource(con, result)
+    assert rows(con) == [(1,), (2,), (3,)]
+
+
+def test_load_append_mismatch(con, tmp_path):
+    # E.g. the last load failed after the parts were appended to the cache
+    first, second = pl.DataFrame({"Id": [1, 2]}), pl.DataFrame({"Id": [3]})
+    cache, _ = write_parts(tmp_path, first, second)
+    con.execute("CREATE TABLE Trips AS SELECT * FROM first;")
+    result = UpdateResult("Trips", cache, kind="append", parts=[])
+    assert warehouse.load_datasource(con, result)
+    # The table is replaced with the cache
+    assert rows(con) == [(1,), (2,), (3,)]
+
+
+SQL = {
+    # Requires the "trips" datasource table
+    "trip_count.sql": "CREATE OR REPLACE TABLE trip_count AS SELECT count(*) AS n FROM trips;",
+    "trip_summary.sql": "CREATE OR REPLACE VIEW trip_summary AS SELECT * FROM trip_count;",
+}
+
+
+@pytest.fixture
+def sql_files(tmp_path, monkeypatch):
+    files = []
+    for name, sql in SQL.items():
+        files.append(tmp_path / name)
+        files[-1].write_text(sql)
+    monkeypatch.setattr(warehouse, "SQL_FILES", files)
+    return files
+
+
+def stale_names(con, sql_files, changed_tables=()):
+    graph, tables = warehouse.get_sql_dependency_graph(sql_files)
+    hashes = {file: warehouse.hash_file(file) for file in sql_files}
+    stale = warehouse._stale_sql_files(con, graph, tables, hashes, changed_tables)
+    return sorted(file.name for file in stale)
+
+
+def record_run(con, file):
+    con.execute(
+        "INSERT OR REPLACE INTO sql_updates (sql_file, last_updated, hash, updated_at)"
+        " VALUES (?, current_date, ?, now());",
+        [file.name, warehouse.hash_file(file)],
+    )
+
+
+def test_stale_sql_files(con, sql_files):
+    count, summary = sql_files
+    # Never run
+    assert stale_names(con, sql_files) == ["trip_count.sql", "trip_summary.sql"]
+    assert stale_names(con, sql_files, None) == stale_names(con, sql_files)
+    record_run(con, count)
+    record_run(con, summary)
+    assert stale_names(con, sql_files) == []
+    # A required table is loaded (e.g. in an earlier run, with '--skip-db')
+    warehouse._mark_table_updated(con, "Trips")
+    assert stale_names(con, sql_files) == ["trip_count.sql", "trip_summary.sql"]
+    # Only the first file ran (e.g. the second failed)
+    record_run(con, count)
+    assert stale_names(con, sql_files) == ["trip_summary.sql"]
+    record_run(con, summary)
+    assert stale_names(con, sql_files) == []
+    # Tables changed this run, and edited files
+    assert stale_names(con, sql_files, ["TRIPS"]) == [
+        "trip_count.sql",
+        "trip_summary.sql",
+    ]
+    summary.write_text(SQL["trip_summary.sql"].replace("*", "n"))
+    assert stale_names(con, sql_files) == ["trip_summary.sql"]
+
+
+def test_update_sql(con, sql_files, tmp_path, monkeypatch):
+    monkeypatch.setattr(warehouse.config, "cache_dir", tmp_path)
+    con.execute("CREATE TABLE trips AS SELECT 1 AS Id;")
+    monkeypatch.setattr(warehouse, "connect", lambda: con)
+    wh = warehouse.Warehouse()
+    assert warehouse.update_sql(wh=wh, changed_tables=[]) == (2, "")
+    assert warehouse.update_sql(wh=wh, changed_tables=[]) == (0, "")
+    # The table was loaded by an earlier process (not passed as changed)
+    cache, _ = write_parts(tmp_path, pl.DataFrame({"Id": [1, 2, 3]}))
+    warehouse.load_datasource(con, UpdateResult("trips", cache, kind="table"))
+    assert warehouse.update_sql(wh=wh, changed_tables=[]) == (2, "")
+    assert con.sql("SELECT n FROM trip_summary").fetchone() == (3,)
+    # All files are run without `changed_tables`
+    assert warehouse.update_sql(wh=wh) == (2, "")
+    assert warehouse._table_exists(con, "dim_calendar")
+
+
+def test_update_sql_calendar(con, tmp_path, monkeypatch):
+    monkeypatch.setattr(warehouse.config, "cache_dir", tmp_path)
+    monkeypatch.setattr(warehouse.config, "holidays", {"New Year's Day": "Closed"})
+    sql_file = tmp_path / "closed_days.sql"
+    sql_file.write_text(
+        "CREATE OR REPLACE TABLE closed_days AS"
+        " SELECT * FROM dim_calendar WHERE Service = 'Closed';"
+    )
+    monkeypatch.setattr(warehouse, "SQL_FILES", [sql_file])
+    monkeypatch.setattr(warehouse, "connect", lambda: con)
+    wh = warehouse.Warehouse()
+    assert warehouse.update_sql(wh=wh, changed_tables=[]) == (1, "")
+    assert warehouse.update_sql(wh=wh, changed_tables=[]) == (0, "")
+    assert not warehouse._update_calendar(con)
+    (closed,) = con.sql("SELECT count(*) FROM closed_days").fetchone()
+    # The holiday config changed, so the calendar and the SQL file are updated
+    monkeypatch.setitem(warehouse.config.holidays, "Christmas Day", "Closed")
+    assert warehouse.update_sql(wh=wh, changed_tables=[]) == (1, "")
+    assert con.sql("SELECT count(*) FROM closed_days").fetchone()[0] > closed
+
+
+@pytest.fixture
+def db_path(tmp_path, monkeypatch):
+    path = tmp_path / "test.duckdb"
+    monkeypatch.setattr(warehouse, "DB_PATH", path)
+    with duckdb.connect(path) as con:
+        con.execute("CREATE SCHEMA staging;")
+        con.execute("CREATE SEQUENCE trip_id START 1;")
+        con.execute(
+            "CREATE TABLE trips (Id INTEGER DEFAULT nextval('trip_id'), Value INTEGER);"
+        )
+        con.execute("INSERT INTO trips (Value) SELECT i FROM range(1000) t(i);")
+        con.execute("CREATE TABLE staging.trips AS SELECT * FROM trips LIMIT 10;")
+        con.execute("CREATE VIEW trip_total AS SELECT sum(Value) AS total FROM trips;")
+        # Free (wasted) space
+        con.execute(
+            "CREATE TABLE big AS SELECT i::VARCHAR AS s FROM range(1000000) t(i);"
+        )
+        con.execute("CHECKPOINT;")
+        con.execute("DROP TABLE big;")
+    return path
+
+
+def test_compact_threshold(db_path):
+    free, total = warehouse.free_space()
+    assert 0 < free < total
+    mtime = db_path.stat().st_mtime_ns
+    # Not worth compacting: the database isn't copied
+    assert warehouse.compact(threshold=1.0).startswith("[white]Not compacted")
+    assert db_path.stat().st_mtime_ns == mtime
+    assert not list(db_path.parent.glob("_compacting_*"))
+
+
+def test_compact(db_path):
+    try:
+        duckdb.connect().execute("install spatial; load spatial;")
+    except duckdb.Error:
+        pytest.skip("Requires the DuckDB spatial extension")
+    _, total = warehouse.free_space()
+    progress = []
+    msg = warehouse.compact(threshold=0.1, progress=lambda *a: progress.append(a))
+    assert msg.startswith("[white]Compacted")
+    assert sorted(progress) == [("trips", 1, 2), ("trips", 2, 2)]
+    assert warehouse.free_space()[1] < total
+    assert not list(db_path.parent.glob("_compacting_*"))
+    # Tables (in all schemas), views, and sequences survive
+    with duckdb.connect(db_path) as con:
+        assert con.sql("SELECT count(*), max(Id) FROM trips").fetchone() == (1000, 1000)
+        assert con.sql("SELECT count(*) FROM staging.trips").fetchone() == (10,)
+        assert con.sql("SELECT total FROM trip_total").fetchone() == (499500,)
+        con.execute("INSERT INTO trips (Value) VALUES (0);")
+        assert con.sql("SELECT count(DISTINCT Id) FROM trips").fetchone() == (1001,)
+
+
+def test_create_schemas(con, tmp_path, monkeypatch):
+    monkeypatch.setattr(warehouse.config, "data_dir", tmp_path)
+    monkeypatch.setattr(warehouse, "connect", lambda: con)
+    con.execute("CREATE TABLE trips (Id INTEGER, Date DATE, Route VARCHAR);")
+    con.execute(
+        "CREATE VIEW trip_days AS SELECT Date, count(*) AS n FROM trips GROUP BY 1;"
+    )
+    con.execute(
+        "CREATE VIEW view_all_tables AS SELECT table_name AS name"
+        " FROM information_schema.tables WHERE table_name IN ('trips', 'trip_days');"
+    )
+    wh = warehouse.Warehouse()
+    warehouse.create_schemas(wh)
+    assert con.sql("SELECT * FROM datasource_schemas").fetchall() == [
+        ("trip_days", "Date", "DATE"),
+        ("trip_days", "n", "BIGINT"),
+        ("trips", "Id", "INTEGER"),
+        ("trips", "Date", "DATE"),
+        ("trips", "Route", "VARCHAR"),
+    ]
+    xlsx_path = tmp_path / "schemas.xlsx"
+    mtime = xlsx_path.stat().st_mtime_ns
+    # Only re-written if the schemas changed
+    warehouse.create_schemas(wh)
+    assert xlsx_path.stat().st_mtime_ns == mtime
+    con.execute("ALTER TABLE trips ADD COLUMN Riders INTEGER;")
+    warehouse.create_schemas(wh, excel=False)
+    assert xlsx_path.stat().st_mtime_ns == mtime
+    assert ("trips", "Riders", "INTEGER") in con.sql(
+        "FROM datasource_schemas"
+    ).fetchall()
+    # Written once the schemas changed since the file was written
+    warehouse.create_schemas(wh)
+    assert xlsx_path.stat().st_mtime_ns != mtime
+    with zipfile.ZipFile(xlsx_path) as zf:
+        workbook = zf.read("xl/workbook.xml").decode()
+    assert 'name="trip_days"' in workbook and 'name="trips"' in workbook